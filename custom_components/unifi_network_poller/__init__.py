@@ -1,33 +1,36 @@
 """The Unifi Network Poller integration."""
 from __future__ import annotations
 
-from typing import Any
-
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME, Platform
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
-from pyunifi.controller import APIError, Controller
-from requests.exceptions import ConnectTimeout
 
-from .const import DOMAIN
-from .coordinator import MyCoordinator
+from .api import DEFAULT_SITE, UnifiAuthError, UnifiError
+from .const import (
+    CONF_GATEWAY_FULL_FETCH_INTERVAL,
+    CONF_PUSH,
+    CONF_SITE,
+    CONF_TRACKED_CLIENTS,
+    DEFAULT_GATEWAY_FULL_FETCH_INTERVAL,
+    DOMAIN,
+)
+from .metrics import async_register_metrics_view
 from .models import BetterUnifiData
+from .poller import (
+    async_acquire_poller,
+    async_release_poller,
+    hub_in_use,
+    hub_key,
+    poller_in_use,
+    poller_key,
+    session_store,
+    topology_store,
+)
 
 # TODO List the platforms that you want to support.
 # For your initial PR, limit it to 1 platform.
-PLATFORMS: list[Platform] = [Platform.SENSOR]
-
-
-def get_hub(data: dict[str, Any]) -> Controller:
-    """Return a hub object based on the user input."""
-    return Controller(
-        data[CONF_HOST],
-        data[CONF_USERNAME],
-        data[CONF_PASSWORD],
-        version="UDMP-unifiOS",
-        ssl_verify=False,
-    )
+PLATFORMS: list[Platform] = [Platform.DEVICE_TRACKER, Platform.SENSOR]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -38,31 +41,66 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # TODO 1. Create API instance
     # TODO 2. Validate the API connection (and authentication)
 
+    # Entries for the same site share one coordinator, every site one login.
     try:
-        hub = await hass.async_add_executor_job(get_hub, entry.data)
-        aps = await hass.async_add_executor_job(hub.get_aps)
-    except APIError as ex:
+        poller = await async_acquire_poller(hass, entry)
+    except UnifiAuthError as ex:
         raise ConfigEntryAuthFailed from ex
-    except ConnectTimeout as ex:
+    except UnifiError as ex:
         raise ConfigEntryNotReady from ex
 
     # TODO 3. Store an API object for your platforms to access
-    macs = [ap["mac"] for ap in aps if ap["model"] in ["USPPDUP", "UDMPROSE"]]
-    coordinator = MyCoordinator(hass, hub, macs)
-    await coordinator.async_config_entry_first_refresh()
+    if entry.options.get(CONF_PUSH, False):
+        poller.async_start_push(entry.entry_id)
+    poller.async_set_full_fetch_interval(
+        entry.entry_id,
+        entry.options.get(
+            CONF_GATEWAY_FULL_FETCH_INTERVAL, DEFAULT_GATEWAY_FULL_FETCH_INTERVAL
+        ),
+    )
 
     hass.data[DOMAIN][entry.entry_id] = BetterUnifiData(
-        api=hub, coordinator=coordinator
+        api=poller.hub, coordinator=poller.coordinator, clients=poller.clients
     )
+    if entry.options.get(CONF_TRACKED_CLIENTS) and poller.clients.data is None:
+        # Client entities are named from the first listing.
+        await poller.clients.async_refresh()
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    poller.async_go_live()
+    async_register_metrics_view(hass)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    return True
+
 
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an entry from before sites could be configured."""
+    if entry.version == 1:
+        entry.version = 2
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_SITE: DEFAULT_SITE}
+        )
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        await async_release_poller(hass, entry)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the cached session and topology unless another entry uses them."""
+    if not hub_in_use(hass, entry):
+        await session_store(hass, hub_key(entry.data)).async_remove()
+    if not poller_in_use(hass, entry):
+        await topology_store(hass, poller_key(entry.data)).async_remove()
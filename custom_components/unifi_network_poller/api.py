@@ -0,0 +1,468 @@
+"""Async client for the UniFi OS network controller API."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+import copy
+import json as jsonlib
+import logging
+import time
+from typing import Any
+
+import aiohttp
+import orjson
+from yarl import URL
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SITE = "default"
+DEFAULT_REQUEST_TIMEOUT = 10
+# Requests a client has open against its controller at once; more wait.
+DEFAULT_MAX_REQUESTS = 4
+WS_HEARTBEAT = 30
+SESSION_COOKIE = "TOKEN"
+# Cached sessions this close to expiry are replaced by a fresh login.
+SESSION_EXPIRY_MARGIN = 300
+
+
+class UnifiError(Exception):
+    """Base error for controller communication."""
+
+
+class UnifiConnectionError(UnifiError):
+    """Error to indicate the controller could not be reached."""
+
+
+class UnifiAuthError(UnifiError):
+    """Error to indicate the controller rejected our credentials or session."""
+
+
+class UnifiRequestError(UnifiError):
+    """Error to indicate the controller refused the request itself."""
+
+
+def _select(devices: list[dict[str, Any]], keys: frozenset[str] | None) -> list[dict]:
+    """Return the device payloads reduced to the given top-level keys."""
+    if keys is None:
+        return devices
+    return [{key: device[key] for key in keys if key in device} for device in devices]
+
+
+def _token_expiry(token: str) -> float | None:
+    """Return the expiry of a UniFi OS session token, if it carries one.
+
+    The token is a JWT; its claims are read without verification since the
+    controller remains the authority on whether the session is still valid.
+    """
+    try:
+        claims = token.split(".")[1]
+        claims += "=" * (-len(claims) % 4)
+        return float(jsonlib.loads(base64.urlsafe_b64decode(claims))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class _LoginState:
+    """The CSRF token and login count shared by the site clients of one login."""
+
+    __slots__ = ("csrf_token", "generation", "on_change")
+
+    def __init__(self) -> None:
+        """Initialize the state of a client that has not logged in."""
+        self.csrf_token: str | None = None
+        self.generation = 0
+        self.on_change: Callable[[], None] | None = None
+
+
+class UnifiClient:
+    """Talk to a UniFi OS controller over a shared, keep-alive aiohttp session.
+
+    The session owns the connection pool and the login cookie; the client only
+    tracks the CSRF token the controller hands back on every response. A
+    request refused with 401 or 403 logs in again and is retried once.
+
+    At most ``max_requests`` requests are open at once, and a stat request
+    made while an identical one is in flight waits for and shares its
+    result instead of reaching the controller again, so concurrent pollers,
+    manual refreshes and setup never send bursts of redundant requests.
+    Shared results must not be modified.
+
+    ``for_site`` returns clients for the controller's other sites that share
+    the login, the request limit and the coalescing of this client.
+    """
+
+    # Responses are decoded with orjson, which Home Assistant already ships.
+    json_loads: Callable[[bytes], Any] = staticmethod(orjson.loads)
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        host: str,
+        username: str,
+        password: str,
+        site: str = DEFAULT_SITE,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        scheme: str = "https",
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+    ) -> None:
+        """Initialize the client."""
+        self.session = session
+        self.host = host
+        self.scheme = scheme
+        self.username = username
+        self.password = password
+        self.site = site
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout)
+        self._login = _LoginState()
+        self._login_lock = asyncio.Lock()
+        self._request_slots = asyncio.Semaphore(max_requests)
+        # Stat requests in flight, by site, method, path and body, and their
+        # callers.
+        self._inflight: dict[tuple[Any, ...], asyncio.Task] = {}
+        self._waiters: Counter[tuple[Any, ...]] = Counter()
+        # Running totals for instrumentation.
+        self.relogins = 0
+        self.coalesced = 0
+        self.bytes_received = 0
+        self.parse_time = 0.0
+
+    def for_site(self, site: str) -> UnifiClient:
+        """Return a client for another site of the controller on this login.
+
+        Both clients share the session, CSRF token, login lock, request slots
+        and in-flight requests, so the controller sees one login whichever
+        site's request finds the session expired. Instrumentation totals are
+        counted per site.
+        """
+        client = copy.copy(self)
+        client.site = site
+        client.relogins = client.coalesced = client.bytes_received = 0
+        client.parse_time = 0.0
+        return client
+
+    @property
+    def csrf_token(self) -> str | None:
+        """Return the CSRF token the controller handed back last."""
+        return self._login.csrf_token
+
+    @csrf_token.setter
+    def csrf_token(self, token: str | None) -> None:
+        self._login.csrf_token = token
+
+    @property
+    def on_session_change(self) -> Callable[[], None] | None:
+        """Return what is called after every successful login.
+
+        It is set e.g. to persist the session, and shared by all sites.
+        """
+        return self._login.on_change
+
+    @on_session_change.setter
+    def on_session_change(self, on_change: Callable[[], None] | None) -> None:
+        self._login.on_change = on_change
+
+    @property
+    def base_url(self) -> str:
+        """Return the root URL of the controller."""
+        return f"{self.scheme}://{self.host}"
+
+    @property
+    def events_url(self) -> str:
+        """Return the URL of the site's websocket event stream."""
+        scheme = "wss" if self.scheme == "https" else "ws"
+        return f"{scheme}://{self.host}/proxy/network/wss/s/{self.site}/events"
+
+    @property
+    def scope(self) -> str:
+        """Return the host, followed by the site unless it is the default one."""
+        if self.site == DEFAULT_SITE:
+            return self.host
+        return f"{self.host}/{self.site}"
+
+    def _api_url(self, path: str) -> str:
+        return f"{self.base_url}/proxy/network/api/s/{self.site}/{path}"
+
+    def _headers(self) -> dict[str, str]:
+        if self.csrf_token is None:
+            return {}
+        return {"X-CSRF-Token": self.csrf_token}
+
+    def _store_csrf(self, response: aiohttp.ClientResponse) -> None:
+        token = response.headers.get("X-Updated-CSRF-Token") or response.headers.get(
+            "X-CSRF-Token"
+        )
+        if token:
+            self.csrf_token = token
+
+    @property
+    def session_state(self) -> dict[str, Any]:
+        """Return the session cookie and CSRF token for persisting."""
+        cookie = self.session.cookie_jar.filter_cookies(URL(self.base_url)).get(
+            SESSION_COOKIE
+        )
+        return {
+            "token": cookie.value if cookie is not None else None,
+            "csrf_token": self.csrf_token,
+        }
+
+    def restore_session(self, state: dict[str, Any]) -> bool:
+        """Reuse a persisted session and return whether it is still usable.
+
+        Sessions whose token expires within SESSION_EXPIRY_MARGIN are not
+        restored. Tokens without a readable expiry are trusted; a refused
+        request then logs in again.
+        """
+        if not (token := state.get("token")):
+            return False
+        expiry = _token_expiry(token)
+        if expiry is not None and expiry - SESSION_EXPIRY_MARGIN < time.time():
+            return False
+        self.session.cookie_jar.update_cookies(
+            {SESSION_COOKIE: token}, URL(self.base_url)
+        )
+        self.csrf_token = state.get("csrf_token")
+        return True
+
+    async def async_login(self) -> None:
+        """Log in and keep the session cookie and CSRF token."""
+        async with self._login_lock:
+            await self._async_login()
+
+    async def _async_reauthenticate(self, generation: int) -> None:
+        """Log in again unless another caller already did since ``generation``."""
+        async with self._login_lock:
+            if self._login.generation == generation:
+                self.relogins += 1
+                await self._async_login()
+
+    async def _async_login(self) -> None:
+        _LOGGER.debug("Logging in to %s as %s", self.host, self.username)
+        try:
+            async with self.session.post(
+                f"{self.base_url}/api/auth/login",
+                json={
+                    "username": self.username,
+                    "password": self.password,
+                    "remember": True,
+                },
+                headers=self._headers(),
+                timeout=self.timeout,
+            ) as response:
+                self._store_csrf(response)
+                if response.status in (401, 403):
+                    raise UnifiAuthError(f"Login rejected: {response.status}")
+                if response.status != 200:
+                    raise UnifiError(f"Login failed: {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise UnifiConnectionError(
+                f"Error connecting to {self.host}: {err}"
+            ) from err
+        self._login.generation += 1
+        if self.on_session_change is not None:
+            self.on_session_change()
+
+    async def async_request(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        params: dict[str, Any] | None = None,
+    ) -> Any:
+        """Call a site API endpoint and return its data payload.
+
+        An expired session is detected from the response status; the client
+        logs in again and retries the request once. Stat requests identical
+        to one in flight share its result.
+        """
+        if not path.startswith("stat/"):
+            return await self._async_request_retry(method, path, json, params)
+        key = (
+            self.site,
+            method,
+            path,
+            orjson.dumps(json, option=orjson.OPT_SORT_KEYS),
+            tuple(sorted(params.items())) if params else (),
+        )
+        if (task := self._inflight.get(key)) is None:
+            task = asyncio.ensure_future(
+                self._async_request_retry(method, path, json, params)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda task: self._request_done(key, task))
+        else:
+            self.coalesced += 1
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            # A caller giving up, e.g. on its timeout, leaves the request to
+            # the others; the last one cancels it.
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                self._request_done(key, task)
+                task.cancel()
+
+    def _request_done(self, key: tuple[Any, ...], task: asyncio.Task) -> None:
+        """Forget a finished stat request, retrieving an error nobody awaited."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.done() and not task.cancelled():
+            task.exception()
+
+    async def _async_request_retry(
+        self,
+        method: str,
+        path: str,
+        json: Any,
+        params: dict[str, Any] | None,
+    ) -> Any:
+        generation = self._login.generation
+        try:
+            return await self._async_request(method, path, json, params)
+        except UnifiAuthError:
+            await self._async_reauthenticate(generation)
+        return await self._async_request(method, path, json, params)
+
+    async def _async_request(
+        self,
+        method: str,
+        path: str,
+        json: Any,
+        params: dict[str, Any] | None,
+    ) -> Any:
+        try:
+            async with self._request_slots, self.session.request(
+                method,
+                self._api_url(path),
+                json=json,
+                params=params,
+                headers=self._headers(),
+                timeout=self.timeout,
+            ) as response:
+                self._store_csrf(response)
+                if response.status in (401, 403):
+                    raise UnifiAuthError(f"Session rejected: {response.status}")
+                if 400 <= response.status < 500:
+                    raise UnifiRequestError(
+                        f"Request refused with {response.status} for {path}"
+                    )
+                if response.status != 200:
+                    raise UnifiError(f"Unexpected status {response.status} for {path}")
+                raw = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise UnifiConnectionError(f"Error requesting {path}: {err}") from err
+
+        start = time.perf_counter()
+        try:
+            body = self.json_loads(raw)
+        except ValueError as err:
+            raise UnifiError(f"Invalid response for {path}: {err}") from err
+        self.parse_time += time.perf_counter() - start
+        self.bytes_received += len(raw)
+
+        meta = body.get("meta", {})
+        if meta.get("rc", "ok") != "ok":
+            msg = meta.get("msg", "Unknown controller error")
+            if msg.startswith("api.err.Invalid"):
+                raise UnifiRequestError(msg)
+            raise UnifiError(msg)
+        return body.get("data", body)
+
+    async def async_get_devices(
+        self, macs: list[str] | None = None, keys: frozenset[str] | None = None
+    ) -> list[dict]:
+        """Return device stats, limited to the given MACs when provided.
+
+        With ``keys``, every payload is cut down to those top-level fields
+        right after decoding, so the subtrees nobody reads are released
+        before the caller processes the devices.
+        """
+        if macs is None:
+            devices = await self.async_request("GET", "stat/device")
+        else:
+            devices = await self.async_request(
+                "POST", "stat/device", json={"macs": macs}
+            )
+        return _select(devices, keys)
+
+    async def async_get_device(
+        self, mac: str, keys: frozenset[str] | None = None
+    ) -> dict[str, Any]:
+        """Return the stats of a single device."""
+        devices = await self.async_request("GET", f"stat/device/{mac}")
+        if not devices:
+            raise UnifiError(f"Device {mac} not found")
+        return _select(devices, keys)[0]
+
+    async def async_get_clients(
+        self, keys: frozenset[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """Return the connected clients, cut down to ``keys`` when given."""
+        return _select(await self.async_request("GET", "stat/sta"), keys)
+
+    async def async_get_report(
+        self,
+        interval: str,
+        kind: str,
+        start: float,
+        end: float,
+        attrs: list[str],
+        mac: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return the controller's historical report rows between two times.
+
+        ``interval`` is 5minutes, hourly or daily, ``kind`` the report type,
+        e.g. gw for gateways; ``start`` and ``end`` are POSIX timestamps. Each
+        row carries its ``time`` in milliseconds and the requested ``attrs``.
+        """
+        body: dict[str, Any] = {
+            "attrs": [*attrs, "time"],
+            "start": int(start * 1000),
+            "end": int(end * 1000),
+        }
+        if mac is not None:
+            body["mac"] = mac
+        return await self.async_request(
+            "POST", f"stat/report/{interval}.{kind}", json=body
+        )
+
+    async def async_get_health(self) -> list[dict[str, Any]]:
+        """Return the site's health summary, one entry per subsystem."""
+        return await self.async_request("GET", "stat/health")
+
+    async def async_get_sysinfo(self) -> list[dict[str, Any]]:
+        """Return controller system information."""
+        return await self.async_request("GET", "stat/sysinfo")
+
+    async def async_events(self) -> AsyncIterator[dict[str, Any]]:
+        """Yield messages from the controller's websocket event stream.
+
+        The iterator ends when the controller closes the connection.
+        """
+        try:
+            async with self.session.ws_connect(
+                self.events_url,
+                params={"clients": "v2"},
+                headers=self._headers(),
+                heartbeat=WS_HEARTBEAT,
+            ) as websocket:
+                async for message in websocket:
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        try:
+                            event = message.json(loads=self.json_loads)
+                        except ValueError:
+                            _LOGGER.debug("Skipping invalid event: %s", message.data)
+                            continue
+                        yield event
+                    elif message.type == aiohttp.WSMsgType.ERROR:
+                        break
+        except aiohttp.WSServerHandshakeError as err:
+            if err.status in (401, 403):
+                raise UnifiAuthError(f"Event stream rejected: {err.status}") from err
+            raise UnifiConnectionError(f"Error opening event stream: {err}") from err
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise UnifiConnectionError(f"Error reading event stream: {err}") from err
@@ -0,0 +1,125 @@
+"""Fill gaps in the gateway counters' statistics from the controller's reports.
+
+Only imported while the recorder is loaded, which this integration lists in
+its after_dependencies instead of requiring it.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_import_statistics,
+    get_metadata,
+    statistics_during_period,
+)
+from homeassistant.const import Platform, UnitOfInformation
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import InformationConverter
+
+from .api import UnifiClient
+from .const import BACKFILL_DAYS, BACKFILL_PAGE_HOURS, DOMAIN
+from .models import DeviceSnapshot
+from .reports import GATEWAY_REPORT_ATTRS, HOUR, gap_statistics, hourly_totals
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _recorded_statistics(
+    hass: HomeAssistant, statistic_id: str, since: datetime, end: datetime
+) -> tuple[StatisticMetaData | None, list[tuple[datetime, float]]]:
+    """Return the metadata and hourly sums recorded for a sensor since ``since``."""
+    metadata = get_metadata(hass, statistic_ids={statistic_id}).get(statistic_id)
+    if metadata is None:
+        return None, []
+    rows = statistics_during_period(
+        hass, since, end, {statistic_id}, "hour", None, {"sum"}
+    ).get(statistic_id, [])
+    return metadata[1], [
+        (dt_util.utc_from_timestamp(row["start"]), row["sum"])
+        for row in rows
+        if row.get("sum") is not None
+    ]
+
+
+async def async_backfill_statistics(
+    hass: HomeAssistant, hub: UnifiClient, gateways: list[DeviceSnapshot]
+) -> None:
+    """Fill the hours missing from the gateway RX/TX sensors' statistics.
+
+    The gaps left by outages, and the BACKFILL_DAYS before the sensors'
+    first statistics, are imported into the sensors' own statistics from
+    the hourly gateway reports, requested BACKFILL_PAGE_HOURS at a time.
+    Sensors without gaps cost no report request.
+    """
+    entity_registry = er.async_get(hass)
+    end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    since = end - timedelta(days=BACKFILL_DAYS)
+    for device in gateways:
+        gaps: dict[str, tuple[StatisticMetaData, list[tuple[datetime, float]]]] = {}
+        # The first missing hour and the recorded hour after the last gap of
+        # each sensor; the report of that recorded hour is needed too.
+        spans: list[tuple[datetime, datetime]] = []
+        for attr, prefix in GATEWAY_REPORT_ATTRS:
+            if (
+                entity_id := entity_registry.async_get_entity_id(
+                    Platform.SENSOR, DOMAIN, f"{prefix}-{device.mac}"
+                )
+            ) is None:
+                continue
+            metadata, existing = await get_instance(hass).async_add_executor_job(
+                _recorded_statistics, hass, entity_id, since, end
+            )
+            if not (missing := gap_statistics(existing, {}, since)):
+                continue
+            gaps[attr] = (metadata, existing)
+            spans.append(
+                (
+                    missing[0]["start"],
+                    next(
+                        start for start, _ in existing if start > missing[-1]["start"]
+                    ),
+                )
+            )
+        if not gaps:
+            continue
+
+        rows: list[dict[str, Any]] = []
+        page_start = min(first for first, _ in spans)
+        last = max(anchor for _, anchor in spans)
+        while page_start <= last:
+            page_end = min(
+                page_start + timedelta(hours=BACKFILL_PAGE_HOURS), last + HOUR
+            )
+            rows.extend(
+                await hub.async_get_report(
+                    "hourly",
+                    "gw",
+                    page_start.timestamp(),
+                    page_end.timestamp(),
+                    list(gaps),
+                    device.mac,
+                )
+            )
+            page_start = page_end
+
+        for attr, (metadata, existing) in gaps.items():
+            unit = metadata["unit_of_measurement"]
+            totals = {
+                hour: InformationConverter.convert(total, UnitOfInformation.BYTES, unit)
+                for hour, total in hourly_totals(rows, attr).items()
+            }
+            statistics = gap_statistics(existing, totals, since)
+            async_import_statistics(hass, metadata, statistics)
+            _LOGGER.debug(
+                "Filled %s hours of %s from %s reports",
+                len(statistics),
+                metadata["statistic_id"],
+                len(rows),
+            )
@@ -0,0 +1,211 @@
+"""Tracking of the controller's connected clients (stations)."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import timedelta
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.device_registry import format_mac
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import UnifiAuthError, UnifiError
+from .const import (
+    CLIENT_POLL_INTERVAL,
+    CONF_TRACKED_CLIENTS,
+    REQUEST_REFRESH_COOLDOWN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Top-level stat/sta fields the client table reads.
+CLIENT_KEYS = frozenset(
+    {
+        "mac",
+        "name",
+        "hostname",
+        "rx_bytes",
+        "tx_bytes",
+        "wired-rx_bytes",
+        "wired-tx_bytes",
+    }
+)
+
+
+def tracked_clients(options: Mapping[str, Any]) -> list[str]:
+    """Return the normalized MACs of the clients an entry tracks."""
+    return [format_mac(mac) for mac in options.get(CONF_TRACKED_CLIENTS, [])]
+
+
+@dataclass(slots=True)
+class ClientDiff:
+    """The MACs of clients that joined, left or moved counters in one poll."""
+
+    joined: list[str] = field(default_factory=list)
+    left: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        """Return whether anything changed."""
+        return bool(self.joined or self.left or self.changed)
+
+
+class ClientTable:
+    """Connected clients indexed by MAC, with their counters in flat arrays.
+
+    Every client gets a slot in the counter and rate arrays; slots of clients
+    that left are released before newcomers are placed, so the table only
+    grows with the largest number of clients connected at once. Applying a poll
+    touches each listed client once and reports the difference to the last
+    one.
+    """
+
+    __slots__ = (
+        "_slots",
+        "_free",
+        "_time",
+        "names",
+        "rx_bytes",
+        "tx_bytes",
+        "rx_rate",
+        "tx_rate",
+    )
+
+    def __init__(self) -> None:
+        """Initialize an empty table."""
+        self._slots: dict[str, int] = {}
+        self._free: list[int] = []
+        self._time: float | None = None
+        self.names: list[str | None] = []
+        self.rx_bytes = array("q")
+        self.tx_bytes = array("q")
+        self.rx_rate = array("d")
+        self.tx_rate = array("d")
+
+    def __len__(self) -> int:
+        """Return the number of connected clients."""
+        return len(self._slots)
+
+    def __contains__(self, mac: object) -> bool:
+        """Return whether a client is connected."""
+        return mac in self._slots
+
+    def slot(self, mac: str) -> int | None:
+        """Return the array position of a connected client."""
+        return self._slots.get(mac)
+
+    def _allocate(self, mac: str) -> int:
+        """Return a free slot for a joining client, growing the arrays if needed."""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self.names)
+            self.names.append(None)
+            for counters in (self.rx_bytes, self.tx_bytes):
+                counters.append(0)
+            for rates in (self.rx_rate, self.tx_rate):
+                rates.append(0.0)
+        self._slots[mac] = slot
+        return slot
+
+    def apply(self, clients: list[dict[str, Any]], received: float) -> ClientDiff:
+        """Replace the table with a stat/sta listing received at ``received``."""
+        diff = ClientDiff()
+        elapsed = received - self._time if self._time is not None else 0.0
+        self._time = received
+        # Release the slots of clients that left first, for the joining ones.
+        seen = {client["mac"] for client in clients}
+        for mac in [mac for mac in self._slots if mac not in seen]:
+            slot = self._slots.pop(mac)
+            self.names[slot] = None
+            self._free.append(slot)
+            diff.left.append(mac)
+
+        for client in clients:
+            mac = client["mac"]
+            rx = client.get("rx_bytes", client.get("wired-rx_bytes", 0))
+            tx = client.get("tx_bytes", client.get("wired-tx_bytes", 0))
+            if (slot := self._slots.get(mac)) is None:
+                slot = self._allocate(mac)
+                self.rx_rate[slot] = self.tx_rate[slot] = 0.0
+                diff.joined.append(mac)
+            elif rx != self.rx_bytes[slot] or tx != self.tx_bytes[slot]:
+                if elapsed > 0:
+                    self.rx_rate[slot] = _rate(self.rx_bytes[slot], rx, elapsed)
+                    self.tx_rate[slot] = _rate(self.tx_bytes[slot], tx, elapsed)
+                diff.changed.append(mac)
+            elif self.rx_rate[slot] or self.tx_rate[slot]:
+                # Idle since the last poll.
+                self.rx_rate[slot] = self.tx_rate[slot] = 0.0
+                diff.changed.append(mac)
+            self.names[slot] = client.get("name") or client.get("hostname")
+            self.rx_bytes[slot] = rx
+            self.tx_bytes[slot] = tx
+        return diff
+
+
+def _rate(previous: int, current: int, elapsed: float) -> float:
+    """Return the rate between two counters, treating a decrease as a reset."""
+    return (current - previous if current >= previous else current) / elapsed
+
+
+class ClientCoordinator(DataUpdateCoordinator[ClientTable]):
+    """Poll the client list and update the entities of the clients that changed.
+
+    Clients only have entities when they are tracked, so most of the table is
+    never read; each poll only notifies listeners whose client joined, left
+    or moved data. Like every coordinator, polling stops while no entity
+    listens.
+    """
+
+    def __init__(self, hass, my_api) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Unifi clients",
+            update_interval=timedelta(seconds=CLIENT_POLL_INTERVAL),
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REQUEST_REFRESH_COOLDOWN, immediate=False
+            ),
+        )
+        self.my_api = my_api
+        self.table = ClientTable()
+        # Listener contexts to update after this refresh; None updates all.
+        self._changed: set[Any] | None = None
+        self._notified_success = True
+
+    async def _async_update_data(self) -> ClientTable:
+        """Fetch the client list and fold it into the table."""
+        try:
+            clients = await self.my_api.async_get_clients(CLIENT_KEYS)
+        except UnifiAuthError as err:
+            raise UpdateFailed(f"Authentication failed: {err}") from err
+        except UnifiError as err:
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+        diff = self.table.apply(clients, time.monotonic())
+        if self.data is not None:
+            self._changed = {*diff.joined, *diff.left, *diff.changed}
+        return self.table
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners of changed clients only.
+
+        Everyone is updated after the first poll and when the coordinator
+        becomes unavailable or recovers.
+        """
+        changed, self._changed = self._changed, None
+        if changed is None or self.last_update_success != self._notified_success:
+            self._notified_success = self.last_update_success
+            super().async_update_listeners()
+            return
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context in changed:
+                update_callback()
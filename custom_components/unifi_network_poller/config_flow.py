@@ -4,16 +4,34 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+from aiohttp import CookieJar
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
-from pyunifi.controller import APIError, Controller
-from requests.exceptions import ConnectTimeout
+from homeassistant.helpers import selector
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 import voluptuous as vol
 
-from .const import DOMAIN
+from .api import DEFAULT_SITE, UnifiAuthError, UnifiClient, UnifiError
+from .const import (
+    CONF_DEVICES,
+    CONF_GATEWAY_FULL_FETCH_INTERVAL,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_MIN_WRITE_INTERVAL,
+    CONF_POWER_DEADBAND,
+    CONF_PUSH,
+    CONF_RATE_DEADBAND,
+    CONF_SITE,
+    CONF_TRACKED_CLIENTS,
+    DEFAULT_GATEWAY_FULL_FETCH_INTERVAL,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MIN_WRITE_INTERVAL,
+    DEFAULT_POWER_DEADBAND,
+    DEFAULT_RATE_DEADBAND,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,49 +41,56 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Required(CONF_HOST): str,
         vol.Required(CONF_USERNAME): str,
         vol.Required(CONF_PASSWORD): str,
+        vol.Optional(CONF_SITE, default=DEFAULT_SITE): str,
     }
 )
 
 
-def get_hub(data: dict[str, Any]) -> Controller:
-    """Return a hub object based on the user input."""
-    return Controller(
-        data[CONF_HOST],
-        data[CONF_USERNAME],
-        data[CONF_PASSWORD],
-        version="UDMP-unifiOS",
-        ssl_verify=False,
-    )
-
-
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect.
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
-    # TODO validate the data can be used to set up a connection.
-
-    # If your PyPI package is not built with async, pass your methods
-    # to the executor:
-    # await hass.async_add_executor_job(
-    #     your_validate_func, data[CONF_USERNAME], data[CONF_PASSWORD]
-    # )
+    # The flow only needs the session for validation, so close it ourselves.
+    session = async_create_clientsession(
+        hass, verify_ssl=False, cookie_jar=CookieJar(unsafe=True), auto_cleanup=False
+    )
+    hub = UnifiClient(
+        session,
+        data[CONF_HOST],
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+        site=data[CONF_SITE],
+    )
     try:
-        hub = await hass.async_add_executor_job(get_hub, data)
-    except ConnectTimeout:
-        raise CannotConnect
-    except APIError:
+        await hub.async_login()
+        sys_info = await hub.async_get_sysinfo()
+    except UnifiAuthError:
         raise InvalidAuth
+    except UnifiError:
+        raise CannotConnect
+    finally:
+        await session.close()
 
-    sys_info = await hass.async_add_executor_job(hub.get_sysinfo)
     # Return info that you want to store in the config entry.
-    return {"title": sys_info[0]["hostname"]}
+    title = sys_info[0]["hostname"]
+    if data[CONF_SITE] != DEFAULT_SITE:
+        title = f"{title} ({data[CONF_SITE]})"
+    return {"title": title}
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Unifi Network Poller."""
 
-    VERSION = 1
+    VERSION = 2
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -73,6 +98,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle the initial step."""
         errors: dict[str, str] = {}
         if user_input is not None:
+            # A site has one entry per user; its device selection is an option.
+            self._async_abort_entries_match(
+                {
+                    CONF_HOST: user_input[CONF_HOST],
+                    CONF_USERNAME: user_input[CONF_USERNAME],
+                    CONF_SITE: user_input[CONF_SITE],
+                }
+            )
             try:
                 info = await validate_input(self.hass, user_input)
             except CannotConnect:
@@ -90,6 +123,86 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle options for Unifi Network Poller."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        # Offer the devices the entry's poller knows, keeping the selection.
+        devices = {mac: mac for mac in options.get(CONF_DEVICES, [])}
+        unifi_data = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        if unifi_data is not None and (data := unifi_data.coordinator.data) is not None:
+            devices.update(
+                (mac, data[mac].name or mac) for mac in unifi_data.coordinator.macs
+            )
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_PUSH, default=options.get(CONF_PUSH, False)
+                    ): bool,
+                    vol.Optional(
+                        CONF_POWER_DEADBAND,
+                        default=options.get(
+                            CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_RATE_DEADBAND,
+                        default=options.get(CONF_RATE_DEADBAND, DEFAULT_RATE_DEADBAND),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                    vol.Optional(
+                        CONF_MIN_WRITE_INTERVAL,
+                        default=options.get(
+                            CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_HEARTBEAT_INTERVAL,
+                        default=options.get(
+                            CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_GATEWAY_FULL_FETCH_INTERVAL,
+                        default=options.get(
+                            CONF_GATEWAY_FULL_FETCH_INTERVAL,
+                            DEFAULT_GATEWAY_FULL_FETCH_INTERVAL,
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_TRACKED_CLIENTS,
+                        default=options.get(CONF_TRACKED_CLIENTS, []),
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiple=True)
+                    ),
+                    vol.Optional(
+                        CONF_DEVICES, default=options.get(CONF_DEVICES, [])
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[
+                                selector.SelectOptionDict(value=mac, label=label)
+                                for mac, label in devices.items()
+                            ],
+                            multiple=True,
+                        )
+                    ),
+                }
+            ),
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -1,3 +1,116 @@
 """Constants for the Unifi Network Poller integration."""
 
+from __future__ import annotations
+
 DOMAIN = "unifi_network_poller"
+
+STORAGE_VERSION = 1
+# Storage keys of the cached controller session and device topology, per host
+# and user.
+SESSION_STORAGE_KEY = DOMAIN + ".{key}.session"
+TOPOLOGY_STORAGE_KEY = DOMAIN + ".{key}.topology"
+
+# Key in hass.data[DOMAIN] of the pollers shared by entries for the same host.
+DATA_POLLERS = "pollers"
+DATA_HUBS = "hubs"
+# Key in hass.data[DOMAIN] set once the metrics view is registered.
+DATA_METRICS_VIEW = "metrics_view"
+
+# Seconds between background listings that add new and retire removed devices.
+DISCOVERY_INTERVAL = 600
+# Dispatcher signal sent with the MACs of newly discovered devices.
+SIGNAL_DEVICES_ADDED = DOMAIN + "_devices_added_{entry_id}"
+
+# Switch models whose ports get throughput sensors.
+SWITCH_MODELS = (
+    "US48PRO",
+    "US48PRO2",
+    "US48",
+    "US48P500",
+    "US48P750",
+    "USL48P",
+    "USL48PB",
+    "US24PRO",
+    "US24PRO2",
+    "US24",
+    "US24P250",
+    "USL24P",
+    "USL24PB",
+    "US16P150",
+    "USL16P",
+    "USL16LP",
+    "US8P150",
+    "US8P60",
+    "USL8LP",
+)
+
+# Seconds between polls of the client list while any client is tracked.
+CLIENT_POLL_INTERVAL = 30
+
+# Seconds between fills of statistics gaps from the controller's hourly reports.
+BACKFILL_INTERVAL = 3600
+# Days back that statistics gaps are filled, before the first statistics too.
+BACKFILL_DAYS = 30
+# Hours of reports requested at once while catching up.
+BACKFILL_PAGE_HOURS = 24
+
+# Upper bound on concurrent per-device requests when the bulk fetch is unavailable.
+DEVICE_FETCH_CONCURRENCY = 4
+# Seconds a single per-device request may take before that device counts as failed.
+DEVICE_REQUEST_TIMEOUT = 5
+# Seconds before a failed device is requested again, doubled with every further
+# failure up to the maximum.
+DEVICE_RETRY_BACKOFF = 30
+DEVICE_RETRY_MAX_BACKOFF = 600
+# Consecutive failures after which a device's entities become unavailable; until
+# then they keep showing its last good snapshot.
+DEVICE_UNAVAILABLE_AFTER = 3
+
+# Longest gap between two power samples that is integrated into energy, in
+# seconds; longer gaps, e.g. while the controller is unreachable, add nothing.
+ENERGY_MAX_GAP = 900
+
+# Fraction of each poll interval randomly added or removed to avoid lockstep polling.
+POLL_JITTER = 0.1
+# Factor applied to a group's interval when its values are moving or settled.
+POLL_TIGHTEN_FACTOR = 0.5
+POLL_RELAX_FACTOR = 1.5
+# Shortest delay between two coordinator refreshes, in seconds.
+POLL_MIN_DELAY = 1.0
+# Seconds within which requested refreshes, e.g. from homeassistant.update_entity
+# on several entities, are merged into a single poll.
+REQUEST_REFRESH_COOLDOWN = 2.0
+
+# Site of the controller an entry polls.
+CONF_SITE = "site"
+
+# Options.
+CONF_PUSH = "push"
+CONF_POWER_DEADBAND = "power_deadband"
+CONF_RATE_DEADBAND = "rate_deadband"
+CONF_MIN_WRITE_INTERVAL = "min_write_interval"
+CONF_HEARTBEAT_INTERVAL = "heartbeat_interval"
+# MACs of the clients that get presence and throughput entities.
+CONF_TRACKED_CLIENTS = "tracked_clients"
+# MACs of the devices that get entities; none selected means all of them.
+CONF_DEVICES = "devices"
+# Seconds between full stat/device fetches of gateways; in between, only their
+# uplink rates are read from the much smaller stat/health summary.
+CONF_GATEWAY_FULL_FETCH_INTERVAL = "gateway_full_fetch_interval"
+
+# Watts a power sensor must move before its state is written.
+DEFAULT_POWER_DEADBAND = 1.0
+# Percent a rate sensor must move before its state is written.
+DEFAULT_RATE_DEADBAND = 5.0
+# Seconds between state writes of the same sensor; 0 writes on every change.
+DEFAULT_MIN_WRITE_INTERVAL = 0
+# Seconds after which a change inside the deadband is written anyway.
+DEFAULT_HEARTBEAT_INTERVAL = 600
+# 0 fetches gateways in full on every poll, so their counters keep the poll
+# cadence.
+DEFAULT_GATEWAY_FULL_FETCH_INTERVAL = 0
+
+# Seconds between reconciliation polls while the event stream is connected.
+PUSH_RECONCILE_INTERVAL = 300
+# Longest wait before reconnecting a dropped event stream, in seconds.
+PUSH_MAX_RECONNECT_DELAY = 300
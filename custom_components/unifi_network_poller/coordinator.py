@@ -1,15 +1,98 @@
 """Example integration using DataUpdateCoordinator."""
 
+import asyncio
+from collections.abc import Iterable
 from datetime import timedelta
 import logging
 import time
+from typing import Any
 
 import async_timeout
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from pyunifi.controller import APIError, Controller
+
+from .api import (
+    UnifiAuthError,
+    UnifiConnectionError,
+    UnifiError,
+    UnifiRequestError,
+)
+from .const import (
+    DEFAULT_GATEWAY_FULL_FETCH_INTERVAL,
+    DEVICE_FETCH_CONCURRENCY,
+    DEVICE_REQUEST_TIMEOUT,
+    DEVICE_RETRY_BACKOFF,
+    DEVICE_RETRY_MAX_BACKOFF,
+    DEVICE_UNAVAILABLE_AFTER,
+    PUSH_MAX_RECONNECT_DELAY,
+    PUSH_RECONCILE_INTERVAL,
+    REQUEST_REFRESH_COOLDOWN,
+    SWITCH_MODELS,
+)
+from .history import EnergyMeter, PortRates
+from .models import DeviceFailure, DeviceSnapshot, OutletSnapshot, PollGroup
+from .scheduler import PollScheduler
+from .stats import PollStats
 
 _LOGGER = logging.getLogger(__name__)
 
+POLL_GROUPS: tuple[PollGroup, ...] = (
+    PollGroup(
+        name="gateway",
+        models=("UDMPROSE",),
+        interval=10,
+        min_interval=5,
+        max_interval=300,
+        signal_fn=lambda device: device.rx_rate + device.tx_rate,
+        threshold=0.2,
+        payload_keys=("uplink",),
+        health=True,
+    ),
+    PollGroup(
+        name="pdu",
+        models=("USPPDUP",),
+        interval=60,
+        min_interval=20,
+        max_interval=600,
+        signal_fn=lambda device: device.ac_power or 0.0,
+        threshold=0.1,
+        payload_keys=("outlet_ac_power_consumption",),
+    ),
+    PollGroup(
+        name="switch",
+        models=SWITCH_MODELS,
+        interval=30,
+        min_interval=10,
+        max_interval=300,
+        signal_fn=lambda device: device.rx_rate + device.tx_rate,
+        threshold=0.2,
+        payload_keys=("uplink",),
+    ),
+)
+# Top-level stat/device fields every snapshot reads.
+SNAPSHOT_KEYS = ("mac", "name", "model")
+# Models the integration creates entities for.
+SUPPORTED_MODELS = tuple(model for group in POLL_GROUPS for model in group.models)
+DEFAULT_POLL_GROUP = PollGroup(
+    name="default",
+    models=(),
+    interval=300,
+    min_interval=300,
+    max_interval=1800,
+    signal_fn=lambda device: 0.0,
+    threshold=1.0,
+)
+
+
+def energy_context(mac: str, outlet_index: int | None = None) -> tuple[Any, ...]:
+    """Return the listener context of a PDU's or outlet's energy sensor.
+
+    Energy grows with every poll of a loaded PDU, so its sensors listen apart
+    from the power sensors, which only change with the readings.
+    """
+    return ("energy", mac, outlet_index)
+
 
 class MyCoordinator(DataUpdateCoordinator):
     """My custom coordinator."""
@@ -22,44 +105,568 @@ class MyCoordinator(DataUpdateCoordinator):
             # Name of the data. For logging purposes.
             name="Unifi Protect Data",
             # Polling interval. Will only be polled if there are subscribers.
+            # Replaced after every refresh by the delay until the next due group.
             update_interval=timedelta(seconds=60),
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REQUEST_REFRESH_COOLDOWN, immediate=False
+            ),
         )
         self.my_api = my_api
         self.macs = macs
+        # Cleared when the controller refuses the bulk request as invalid, so
+        # we do not pay for a failing round trip on every poll. Other errors
+        # only fall back to per-device requests for that poll.
+        self.bulk_fetch = True
+        # Cleared when the controller refuses stat/health as invalid, so
+        # gateways are always fetched in full.
+        self.health_fetch = True
+        # Seconds between full fetches of devices whose uplink rates can come
+        # from stat/health in between; 0 fetches them in full on every poll.
+        self.full_fetch_interval: float = DEFAULT_GATEWAY_FULL_FETCH_INTERVAL
+        # When each device was last fetched in full.
+        self._full_fetched: dict[str, float] = {}
+        # Per-port rates of the devices that report a port table.
+        self.port_rates: dict[str, PortRates] = {}
+        # Energy since startup of each PDU and outlet, by energy_context.
+        self.energy: dict[Any, EnergyMeter] = {}
+        self.scheduler = PollScheduler((*POLL_GROUPS, DEFAULT_POLL_GROUP))
+        # Poll group of each device, known once its model has been fetched.
+        self.groups: dict[str, PollGroup] = {}
+        self._signals: dict[str, float] = {}
+        # Set while the websocket event stream delivers device updates.
+        self.push_connected = False
+        self.stats = PollStats()
+        # Devices whose last requests failed while others answered.
+        self.device_failures: dict[str, DeviceFailure] = {}
+        # Top-level fields kept from device payloads; None keeps them all.
+        self.payload_keys: frozenset[str] | None = None
+        # What the device-level entities of each MAC read at the last update.
+        self._values: dict[str, tuple[Any, ...]] = {}
+        # Listener contexts to update after this refresh; None updates all.
+        self._changed: set[Any] | None = None
+        self._notified_success = True
+        # Entities whose latest value is held back by their write policy.
+        self.held_back: set[Any] = set()
+
+    async def _async_fetch_bulk(self, macs: list[str]) -> dict[str, DeviceSnapshot]:
+        """Fetch the given devices with a single stat/device request."""
+        start = time.monotonic()
+        devices = await self.my_api.async_get_devices(macs, self.payload_keys)
+        received = time.monotonic()
+        for device in devices:
+            self.stats.observe_device(device["mac"], received - start)
+        return {
+            device["mac"]: DeviceSnapshot.from_payload(device, received)
+            for device in devices
+        }
+
+    async def _async_fetch_each(
+        self, macs: list[str]
+    ) -> tuple[dict[str, DeviceSnapshot], dict[str, Exception]]:
+        """Fetch devices one request per MAC, a few at a time.
+
+        Every request has its own timeout, and a device that fails or times
+        out is returned with its error instead of failing the others.
+        """
+        semaphore = asyncio.Semaphore(DEVICE_FETCH_CONCURRENCY)
+
+        async def _fetch(mac: str) -> DeviceSnapshot:
+            async with semaphore:
+                start = time.monotonic()
+                async with async_timeout.timeout(DEVICE_REQUEST_TIMEOUT):
+                    device = await self.my_api.async_get_device(mac, self.payload_keys)
+                received = time.monotonic()
+                self.stats.observe_device(mac, received - start)
+                return DeviceSnapshot.from_payload(device, received)
+
+        results = await asyncio.gather(
+            *(_fetch(mac) for mac in macs), return_exceptions=True
+        )
+        devices: dict[str, DeviceSnapshot] = {}
+        errors: dict[str, Exception] = {}
+        for mac, result in zip(macs, results):
+            if isinstance(result, UnifiAuthError):
+                raise result
+            if isinstance(result, (UnifiError, asyncio.TimeoutError)):
+                errors[mac] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                devices[mac] = result
+        return devices, errors
+
+    async def _async_fetch_devices(
+        self, macs: list[str]
+    ) -> tuple[dict[str, DeviceSnapshot], dict[str, Exception]]:
+        """Fetch the given devices, preferring the bulk request.
+
+        Payloads are projected into snapshots as soon as they are parsed, so
+        the raw responses never outlive the fetch. Devices that could not be
+        fetched are returned with their errors.
+        """
+        devices: dict[str, DeviceSnapshot] = {}
+        if not macs:
+            return devices, {}
+        if self.bulk_fetch:
+            try:
+                devices = await self._async_fetch_bulk(macs)
+            except UnifiAuthError:
+                raise
+            except UnifiRequestError as err:
+                _LOGGER.debug(
+                    "Bulk device fetch refused, using per-device requests: %s", err
+                )
+                self.bulk_fetch = False
+            except (UnifiError, asyncio.TimeoutError) as err:
+                # Also when it timed out or the connection dropped: the
+                # per-device requests tell which devices are unreachable.
+                _LOGGER.debug(
+                    "Bulk device fetch failed, using per-device requests once: %r",
+                    err,
+                )
+        errors: dict[str, Exception] = {}
+        if missing := [mac for mac in macs if mac not in devices]:
+            fetched, errors = await self._async_fetch_each(missing)
+            devices.update(fetched)
+        return devices, errors
+
+    def _health_macs(self, macs: list[str], now: float) -> list[str]:
+        """Return the devices whose uplink rates can come from stat/health.
+
+        That is the health poll groups' devices fetched in full within the
+        last ``full_fetch_interval`` seconds and not currently failing.
+        """
+        if not self.health_fetch or self.full_fetch_interval <= 0 or self.data is None:
+            return []
+        return [
+            mac
+            for mac in macs
+            if (group := self.groups.get(mac)) is not None
+            and group.health
+            and mac not in self.device_failures
+            and mac in self._full_fetched
+            and now - self._full_fetched[mac] < self.full_fetch_interval
+        ]
+
+    async def _async_fetch_health(self, macs: list[str]) -> dict[str, DeviceSnapshot]:
+        """Refresh the uplink rates of the given devices from stat/health.
+
+        The summary is a fraction of the size of a gateway's stat/device
+        payload. Returns the updated snapshots; devices missing from the
+        summary are left for the full fetch.
+        """
+        if not macs:
+            return {}
+        try:
+            health = await self.my_api.async_get_health()
+        except (UnifiAuthError, UnifiConnectionError):
+            raise
+        except UnifiRequestError as err:
+            _LOGGER.debug("Health summary refused, fetching gateways in full: %s", err)
+            self.health_fetch = False
+            return {}
+        except UnifiError as err:
+            _LOGGER.debug("Health summary failed, fetching gateways in full: %s", err)
+            return {}
+        received = time.monotonic()
+        wans = {
+            subsystem.get("gw_mac"): subsystem
+            for subsystem in health
+            if subsystem.get("subsystem") == "wan"
+        }
+        devices: dict[str, DeviceSnapshot] = {}
+        for mac in macs:
+            if (wan := wans.get(mac)) is not None:
+                devices[mac] = self.data[mac]
+                devices[mac].apply_health(wan, received)
+        return devices
+
+    def _group_for(self, device: DeviceSnapshot) -> PollGroup:
+        """Return the poll group a device belongs to."""
+        return next(
+            (group for group in POLL_GROUPS if device.model in group.models),
+            DEFAULT_POLL_GROUP,
+        )
+
+    def _is_moving(self, mac: str, device: DeviceSnapshot) -> bool:
+        """Return whether the device's signal changed enough to poll faster."""
+        group = self.groups[mac]
+        signal = group.signal_fn(device)
+        previous = self._signals.get(mac)
+        self._signals[mac] = signal
+        if previous is None:
+            return False
+        return abs(signal - previous) > group.threshold * max(abs(previous), 1.0)
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
 
-        This is the place to pre-process the data to lookup tables
-        so entities can quickly look up their data.
+        Only the devices whose poll group is due are fetched; the others keep
+        the snapshot from their last poll. Afterwards the refresh interval is
+        set to the time until the next group is due.
         """
+        now = time.monotonic()
+        if self.push_connected:
+            # Pushed updates keep the data fresh; this is a full reconciliation.
+            self.scheduler.expire()
+        due = self.scheduler.due(now)
+        macs = [
+            mac
+            for mac in self.macs
+            if (mac not in self.groups or self.groups[mac].name in due)
+            and (
+                (failure := self.device_failures.get(mac)) is None
+                or failure.retry_at <= now
+            )
+        ]
+        bytes_received = self.my_api.bytes_received
+        parse_time = self.my_api.parse_time
         try:
-            # Note: asyncio.TimeoutError and aiohttp.ClientError are already
-            # handled by the data update coordinator.
-            async with async_timeout.timeout(10):
-                # Grab active context variables to limit data required to be fetched from API
-                # Note: using context is not required if there is no need or ability to limit
-                # data retrieved from API.
-                # return await self.my_api.fetch_data(listening_idx)
-                data_val = {}
-                data_val["time"] = time.monotonic()
-                for mac in self.macs:
-                    data_val[mac] = await self.hass.async_add_executor_job(
-                        self.my_api.get_device_stat, mac
-                    )
-                if self.data:
-                    data_val["prev_data"] = {
-                        k: v for k, v in self.data.items() if k not in {"prev_data"}
-                    }
-                return data_val
-        except APIError as err:
+            devices, errors = await self._async_poll(macs, now)
+        except (UpdateFailed, asyncio.TimeoutError):
+            self.stats.failures += 1
+            for name in due:
+                self.scheduler.failed(name, now)
+            raise
+        else:
+            moving: set[str] = set()
+            changed: set[Any] = set()
+            outlets = self.data["outlets"] if self.data is not None else {}
+            known = set(self.macs)
+            for mac in devices:
+                if mac not in known:
+                    # Retired by discovery while the poll was in flight.
+                    continue
+                group = self.groups.setdefault(mac, self._group_for(devices[mac]))
+                if self._is_moving(mac, devices[mac]):
+                    moving.add(group.name)
+                changed |= self._update_energy(mac, devices[mac])
+                changed |= self._changed_contexts(mac, devices[mac], outlets)
+            for name in due:
+                self.scheduler.succeeded(name, now, name in moving)
+            if self.data is not None:
+                # Devices changing availability update all their entities.
+                flipped = self._track_failures(now, devices, errors)
+                self._changed = None if flipped else changed
+        finally:
+            self._record_poll(now, bytes_received, parse_time)
+            delay = self.scheduler.next_delay(now)
+            if self.push_connected:
+                delay = max(delay, PUSH_RECONCILE_INTERVAL)
+            self.update_interval = timedelta(seconds=delay)
+
+        return self._build_data(devices)
+
+    def _record_poll(
+        self, start: float, bytes_received: int, parse_time: float
+    ) -> None:
+        """Record a poll that started at ``start`` given the client totals then."""
+        stats = self.stats
+        stats.polls += 1
+        stats.last_poll_latency = time.monotonic() - start
+        stats.poll_latency.observe(stats.last_poll_latency)
+        stats.last_bytes = self.my_api.bytes_received - bytes_received
+        stats.bytes_received += stats.last_bytes
+        stats.last_parse_time = self.my_api.parse_time - parse_time
+        stats.parse_time.observe(stats.last_parse_time)
+        stats.relogins = self.my_api.relogins
+        stats.coalesced = self.my_api.coalesced
+
+    def _device_values(self, mac: str, device: DeviceSnapshot) -> tuple[Any, ...]:
+        """Return everything the device-level entities of a device read."""
+        values: tuple[Any, ...] = (
+            device.name,
+            device.model,
+            device.rx_bytes,
+            device.tx_bytes,
+            device.ac_power,
+            device.rx_rate,
+            device.tx_rate,
+        )
+        if (rates := self.port_rates.get(mac)) is not None:
+            values += (rates.rx_bytes, rates.tx_bytes, rates.rx_rate, rates.tx_rate)
+        return values
+
+    def _changed_contexts(
+        self,
+        mac: str,
+        device: DeviceSnapshot,
+        outlets: dict[tuple[str, int], OutletSnapshot],
+    ) -> set[Any]:
+        """Return the listener contexts of a device whose values changed.
+
+        Device-level entities listen on the MAC and outlet entities on
+        (MAC, outlet index); ``outlets`` holds the outlets last notified.
+        """
+        changed: set[Any] = set()
+        values = self._device_values(mac, device)
+        if self._values.get(mac) != values:
+            self._values[mac] = values
+            changed.add(mac)
+        for outlet in device.outlets:
+            if outlets.get((mac, outlet.index)) != outlet:
+                changed.add((mac, outlet.index))
+        return changed
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners of changed devices and count their state writes.
+
+        Listeners without a context and entities holding back a value are
+        always updated, and everyone is updated when the coordinator becomes
+        unavailable or recovers.
+        """
+        writes = self.stats.entity_writes
+        changed, self._changed = self._changed, None
+        if changed is None or self.last_update_success != self._notified_success:
+            self._notified_success = self.last_update_success
+            super().async_update_listeners()
+        else:
+            changed.add(None)
+            self.async_update_device_listeners(changed)
+            for entity in list(self.held_back):
+                if entity.coordinator_context not in changed:
+                    entity._handle_coordinator_update()
+        self.stats.last_entity_writes = self.stats.entity_writes - writes
+
+    def _build_data(self, devices: dict[str, DeviceSnapshot]) -> dict[Any, Any]:
+        """Return the coordinator data with the given snapshots applied.
+
+        Devices missing from ``devices`` keep their current snapshot.
+        """
+        previous = self.data or {}
+        data_val = {}
+        for mac in self.macs:
+            data_val[mac] = devices.get(mac, previous.get(mac))
+        data_val["outlets"] = {
+            (mac, outlet.index): outlet
+            for mac in self.macs
+            for outlet in data_val[mac].outlets
+        }
+        data_val["ports"] = self.port_rates
+        data_val["energy"] = self.energy
+        data_val["stats"] = self.stats
+        return data_val
+
+    @property
+    def topology(self) -> list[dict[str, Any]]:
+        """Return the cacheable topology of the polled devices."""
+        return [self.data[mac].topology() for mac in self.macs]
+
+    @callback
+    def async_keep_payload_keys(self, keys: Iterable[str]) -> None:
+        """Keep the given payload fields, dropping those nobody reads.
+
+        The snapshot and poll group fields are always kept. Every platform
+        adds the fields its entity descriptions read.
+        """
+        if self.payload_keys is None:
+            self.payload_keys = frozenset(SNAPSHOT_KEYS).union(
+                *(group.payload_keys for group in POLL_GROUPS)
+            )
+        self.payload_keys |= frozenset(keys)
+
+    @callback
+    def async_seed(self, devices: list[DeviceSnapshot]) -> None:
+        """Use cached snapshots as data until the first poll replaces them."""
+        self.data = self._build_data({device.mac: device for device in devices})
+
+    async def async_discover(self) -> tuple[list[str], list[str]]:
+        """List the controller's devices and start or stop polling the changes.
+
+        New devices start with the snapshot from the listing, so entities can
+        be created for them right away. Returns the added and removed MACs.
+        """
+        payloads = await self.my_api.async_get_devices(keys=self.payload_keys)
+        received = time.monotonic()
+        found = {
+            device["mac"]: device
+            for device in payloads
+            if device.get("model") in SUPPORTED_MODELS
+        }
+        known = set(self.macs)
+        added = [mac for mac in found if mac not in known]
+        removed = [mac for mac in self.macs if mac not in found]
+        if not added and not removed:
+            return added, removed
+
+        for mac in removed:
+            self.stats.device_latency.pop(mac, None)
+            self._values.pop(mac, None)
+            self.port_rates.pop(mac, None)
+            self.groups.pop(mac, None)
+            self._full_fetched.pop(mac, None)
+            for context in [context for context in self.energy if context[1] == mac]:
+                del self.energy[context]
+            self._signals.pop(mac, None)
+        self.macs = [mac for mac in self.macs if mac in found] + added
+        self.data = self._build_data(
+            {mac: DeviceSnapshot.from_payload(found[mac], received) for mac in added}
+        )
+        return added, removed
+
+    async def _async_poll(
+        self, macs: list[str], now: float
+    ) -> tuple[dict[str, DeviceSnapshot], dict[str, Exception]]:
+        """Fetch the given devices and record their port counter samples.
+
+        Devices of health poll groups only get their uplink rates from
+        stat/health, unless their full fetch is due. The update only fails as
+        a whole when no device answered, or when a device that has no
+        snapshot yet failed; otherwise the failed devices are returned with
+        their errors and keep their last good snapshot.
+        """
+        try:
+            devices = await self._async_fetch_health(self._health_macs(macs, now))
+            fetched, errors = await self._async_fetch_devices(
+                [mac for mac in macs if mac not in devices]
+            )
+        except UnifiAuthError as err:
+            # The client already logged in again and retried once.
+            raise UpdateFailed(f"Authentication failed: {err}") from err
+        except UnifiError as err:
             raise UpdateFailed(f"Error communicating with API: {err}") from err
-        except KeyError as err:
-            try:
-                await self.hass.async_add_executor_job(self.my_api._login)
-            except APIError as inner_err:
-                raise UpdateFailed(
-                    f"Error communicating with API: {inner_err}"
-                ) from inner_err
-            else:
-                raise UpdateFailed(f"Need to Relogin: {err}") from err
+        devices.update(fetched)
+        if errors and (
+            not devices
+            or self.data is None
+            or any(mac not in self.data for mac in errors)
+        ):
+            mac, err = next(iter(errors.items()))
+            raise UpdateFailed(f"Error communicating with API for {mac}: {err!r}")
+
+        known = set(self.macs)
+        for mac, device in fetched.items():
+            self._full_fetched[mac] = now
+            if mac in known and device.ports is not None:
+                self._update_port_rates(mac, device)
+        return devices, errors
+
+    def device_available(self, mac: str) -> bool:
+        """Return whether a device's entities should be shown as available."""
+        failure = self.device_failures.get(mac)
+        return failure is None or failure.count < DEVICE_UNAVAILABLE_AFTER
+
+    def _track_failures(
+        self,
+        now: float,
+        devices: dict[str, DeviceSnapshot],
+        errors: dict[str, Exception],
+    ) -> bool:
+        """Back off failed devices and return whether any changed availability.
+
+        A failed device keeps its previous snapshot, marked stale, and is
+        requested again after an exponentially growing delay.
+        """
+        flipped = False
+        for mac in devices:
+            if (failure := self.device_failures.pop(mac, None)) is not None:
+                _LOGGER.info("Device %s answered again", mac)
+                flipped |= failure.count >= DEVICE_UNAVAILABLE_AFTER
+        for mac, err in errors.items():
+            failure = self.device_failures.get(mac) or DeviceFailure(0, now, "")
+            failure.count += 1
+            failure.retry_at = now + min(
+                DEVICE_RETRY_BACKOFF * 2 ** (failure.count - 1),
+                DEVICE_RETRY_MAX_BACKOFF,
+            )
+            failure.error = repr(err)
+            self.device_failures[mac] = failure
+            self.data[mac].stale = True
+            flipped |= failure.count == DEVICE_UNAVAILABLE_AFTER
+            _LOGGER.debug(
+                "Device %s failed %d times, retrying in %.0f s: %r",
+                mac,
+                failure.count,
+                failure.retry_at - now,
+                err,
+            )
+        return flipped
+
+    def _update_port_rates(self, mac: str, device: DeviceSnapshot) -> None:
+        """Fold a device's port counters into its per-port rates."""
+        ports = device.ports
+        rates = self.port_rates.get(mac)
+        if rates is None or rates.ports != ports.indexes:
+            rates = self.port_rates[mac] = PortRates(ports.indexes)
+        rates.update(device.received, ports.rx_bytes, ports.tx_bytes)
+
+    def _update_energy(self, mac: str, device: DeviceSnapshot) -> set[Any]:
+        """Integrate a device's power readings and return the grown meters."""
+        grown: set[Any] = set()
+        readings = [
+            (energy_context(mac, outlet.index), outlet.power)
+            for outlet in device.outlets
+            if outlet.power is not None
+        ]
+        if device.ac_power is not None:
+            readings.append((energy_context(mac), device.ac_power))
+        for context, power in readings:
+            if (meter := self.energy.get(context)) is None:
+                meter = self.energy[context] = EnergyMeter()
+            if meter.add(device.received, power):
+                grown.add(context)
+        return grown
+
+    @callback
+    def async_update_device_listeners(self, contexts: set[Any]) -> None:
+        """Update only the listeners whose context is one of the given ones."""
+        for update_callback, context in list(self._listeners.values()):
+            if context in contexts:
+                update_callback()
+
+    @callback
+    def _async_handle_event(self, event: dict[str, Any]) -> None:
+        """Apply a device:sync message to the snapshots it mentions."""
+        if self.data is None or event.get("meta", {}).get("message") != "device:sync":
+            return
+        received = time.monotonic()
+        changed: set[Any] = set()
+        for payload in event.get("data", ()):
+            mac = payload.get("mac")
+            if not isinstance(device := self.data.get(mac), DeviceSnapshot):
+                continue
+            device.apply_payload(payload, received)
+            if "port_table" in payload and device.ports is not None:
+                self._update_port_rates(mac, device)
+            changed |= self._update_energy(mac, device)
+            changed |= self._changed_contexts(mac, device, self.data["outlets"])
+            for outlet in device.outlets:
+                self.data["outlets"][(mac, outlet.index)] = outlet
+        if changed:
+            self.async_update_device_listeners(changed)
+
+    async def async_push_loop(self) -> None:
+        """Follow the controller's event stream until cancelled.
+
+        Reconnects with exponential backoff and logs in again when the stream
+        is refused. While connected, polling only reconciles every
+        PUSH_RECONCILE_INTERVAL seconds. A message that cannot be applied is
+        logged and skipped; polling returns to its schedule once the loop
+        ends for any reason.
+        """
+        delay = 1.0
+        try:
+            while True:
+                try:
+                    async for event in self.my_api.async_events():
+                        if not self.push_connected:
+                            _LOGGER.debug("Event stream connected")
+                            self.push_connected = True
+                            delay = 1.0
+                        try:
+                            self._async_handle_event(event)
+                        except Exception:  # pylint: disable=broad-except
+                            _LOGGER.exception("Error applying event: %s", event)
+                except UnifiAuthError:
+                    try:
+                        await self.my_api.async_login()
+                    except UnifiError as err:
+                        _LOGGER.debug("Login for event stream failed: %s", err)
+                except UnifiError as err:
+                    _LOGGER.debug("Event stream failed: %s", err)
+                self.push_connected = False
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, PUSH_MAX_RECONNECT_DELAY)
+        finally:
+            self.push_connected = False
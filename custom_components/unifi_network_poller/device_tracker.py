@@ -0,0 +1,49 @@
+"""Presence of the tracked clients of a UniFi controller."""
+
+from homeassistant.components.device_tracker import ScannerEntity, SourceType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .clients import tracked_clients
+from .const import DOMAIN
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up a tracker for every client the entry tracks."""
+    unifiData = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        MyClientTracker(unifiData.clients, entry.entry_id, mac)
+        for mac in tracked_clients(entry.options)
+    )
+
+
+class MyClientTracker(CoordinatorEntity, ScannerEntity):
+    """Whether a tracked client is connected to the controller's network."""
+
+    def __init__(self, coordinator, entry_id, mac):
+        """Pass coordinator to CoordinatorEntity."""
+        super().__init__(coordinator, context=mac)
+        self._mac = mac
+        table = coordinator.table
+        slot = table.slot(mac)
+        self._attr_name = (table.names[slot] if slot is not None else None) or mac
+        self._attr_unique_id = f"client-{entry_id}-{mac}"
+
+    @property
+    def source_type(self) -> SourceType:
+        """Return the source type of the client."""
+        return SourceType.ROUTER
+
+    @property
+    def is_connected(self) -> bool:
+        """Return whether the client is connected."""
+        return self._mac in self.coordinator.table
+
+    @property
+    def mac_address(self) -> str:
+        """Return the MAC address of the client."""
+        return self._mac
+
+    @property
+    def entity_registry_enabled_default(self) -> bool:
+        """Enable the tracker; the client was picked by the user."""
+        return True
@@ -0,0 +1,42 @@
+"""Diagnostics support for the Unifi Network Poller integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    unifiData = hass.data[DOMAIN][entry.entry_id]
+    coordinator = unifiData.coordinator
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "bulk_fetch": coordinator.bulk_fetch,
+            "health_fetch": coordinator.health_fetch,
+            "push_connected": coordinator.push_connected,
+            "poll_intervals": {
+                name: coordinator.scheduler.interval(name)
+                for name in coordinator.scheduler.groups
+            },
+        },
+        "devices": coordinator.topology,
+        "device_failures": {
+            mac: {"count": failure.count, "error": failure.error}
+            for mac, failure in coordinator.device_failures.items()
+        },
+        "stats": coordinator.stats.as_dict(),
+    }
@@ -0,0 +1,93 @@
+"""Per-port counter samples and power readings used to derive rates and energy."""
+
+from __future__ import annotations
+
+from array import array
+
+from .const import ENERGY_MAX_GAP
+
+
+class PortRates:
+    """Byte counters and rates of every port of one device, in flat arrays.
+
+    Each poll's counters arrive packed into arrays by the snapshot projection.
+    ``update`` turns them into per-port rates in one pass per direction, so
+    port entities only index into precomputed results.
+    """
+
+    __slots__ = (
+        "ports",
+        "_slots",
+        "rx_bytes",
+        "tx_bytes",
+        "rx_rate",
+        "tx_rate",
+        "_time",
+    )
+
+    def __init__(self, ports: tuple[int, ...]) -> None:
+        """Initialize rates for the given port indexes."""
+        self.ports = ports
+        self._slots = {port: slot for slot, port in enumerate(ports)}
+        zeros = bytes(8 * len(ports))
+        self.rx_bytes = array("q", zeros)
+        self.tx_bytes = array("q", zeros)
+        self.rx_rate = array("d", zeros)
+        self.tx_rate = array("d", zeros)
+        self._time: float | None = None
+
+    def slot(self, port: int) -> int | None:
+        """Return the array position of a port index."""
+        return self._slots.get(port)
+
+    def update(self, timestamp: float, rx_bytes: array, tx_bytes: array) -> None:
+        """Record the counters of a poll received at ``timestamp``."""
+        if self._time is not None and timestamp > self._time:
+            scale = 1 / (timestamp - self._time)
+            self.rx_rate = _rates(self.rx_bytes, rx_bytes, scale)
+            self.tx_rate = _rates(self.tx_bytes, tx_bytes, scale)
+        self.rx_bytes = rx_bytes
+        self.tx_bytes = tx_bytes
+        self._time = timestamp
+
+
+class EnergyMeter:
+    """Energy of one power reading, integrated over its samples.
+
+    Each pair of consecutive samples adds the trapezoid under the power
+    curve. Pairs further apart than ``max_gap`` seconds, e.g. across an
+    outage, are skipped rather than guessed.
+    """
+
+    __slots__ = ("kwh", "max_gap", "_time", "_power")
+
+    def __init__(self, max_gap: float = ENERGY_MAX_GAP) -> None:
+        """Initialize a meter without samples."""
+        self.kwh = 0.0
+        self.max_gap = max_gap
+        self._time: float | None = None
+        self._power = 0.0
+
+    def add(self, timestamp: float, power: float) -> bool:
+        """Record the watts read at ``timestamp``; return whether energy grew."""
+        previous, last = self._power, self._time
+        self._power = power
+        if last is not None and timestamp <= last:
+            return False
+        self._time = timestamp
+        if last is None or timestamp - last > self.max_gap:
+            return False
+        energy = (previous + power) / 2 * (timestamp - last) / 3_600_000
+        self.kwh += energy
+        return energy > 0
+
+
+def _rates(previous: array, current: array, scale: float) -> array:
+    """Return the per-slot rates of two counter arrays, resets included."""
+    return array(
+        "d",
+        [
+            (new - old if new >= old else new) * scale
+            for old, new in zip(previous, current)
+        ],
+    )
@@ -0,0 +1,284 @@
+"""OpenMetrics exposition of the polled data, for Prometheus scrapes.
+
+Scrapes read what the coordinators last polled, so the controller is not
+asked again for the same counters.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from http import HTTPStatus
+from typing import Any
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_METRICS_VIEW, DATA_POLLERS, DOMAIN
+from .models import DeviceSnapshot
+from .stats import Histogram
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Metric families in exposition order: (name, type, unit, help).
+FAMILIES = (
+    ("unifi_device_up", "gauge", "", "Whether the device answered recent polls."),
+    (
+        "unifi_uplink_receive_bytes",
+        "counter",
+        "bytes",
+        "Bytes received on the device uplink.",
+    ),
+    (
+        "unifi_uplink_transmit_bytes",
+        "counter",
+        "bytes",
+        "Bytes transmitted on the device uplink.",
+    ),
+    ("unifi_pdu_power_watts", "gauge", "watts", "AC power consumption of a PDU."),
+    ("unifi_outlet_power_watts", "gauge", "watts", "Power drawn by a PDU outlet."),
+    ("unifi_polls", "counter", "", "Polls of the controller."),
+    ("unifi_poll_failures", "counter", "", "Polls of the controller that failed."),
+    (
+        "unifi_poll_received_bytes",
+        "counter",
+        "bytes",
+        "Response bytes received from the controller.",
+    ),
+    (
+        "unifi_poll_duration_seconds",
+        "histogram",
+        "seconds",
+        "Duration of a poll of the controller.",
+    ),
+    (
+        "unifi_poll_parse_seconds",
+        "histogram",
+        "seconds",
+        "Time spent decoding the responses of a poll.",
+    ),
+)
+FAMILY_INDEX = {family[0]: index for index, family in enumerate(FAMILIES)}
+HEADERS = tuple(
+    f"# TYPE {name} {kind}\n"
+    + (f"# UNIT {name} {unit}\n" if unit else "")
+    + f"# HELP {name} {help_text}\n"
+    for name, kind, unit, help_text in FAMILIES
+)
+
+
+def _escape(value: str) -> str:
+    """Return a label value escaped for the exposition format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    """Return a label set, e.g. {mac="..."}."""
+    return (
+        "{"
+        + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+        + "}"
+    )
+
+
+def _number(value: float) -> str:
+    """Return a sample value, spelling infinity the way OpenMetrics does."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value)
+
+
+def _histogram(name: str, labels: dict[str, str], histogram: Histogram) -> str:
+    """Return the bucket, count and sum samples of a histogram."""
+    lines = [
+        f"{name}_bucket{_labels(**labels, le=_number(bound))} {count}\n"
+        for bound, count in histogram.cumulative()
+    ]
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}\n")
+    lines.append(f"{name}_sum{_labels(**labels)} {_number(histogram.sum)}\n")
+    return "".join(lines)
+
+
+class MetricsExporter:
+    """The samples of one coordinator, cached per device and metric family.
+
+    A device's samples are only formatted again when the values they show
+    changed, and the per-family blocks are only joined again when any device
+    or the poll statistics changed. ``blocks`` returns the same tuple until
+    then, so the view can tell that its rendered body is still current.
+    """
+
+    def __init__(self, coordinator: Any, controller: str) -> None:
+        """Initialize the exporter."""
+        self.coordinator = coordinator
+        self.controller = controller
+        # Per device: the values last formatted and their sample lines by family.
+        self._devices: dict[str, tuple[tuple[Any, ...], dict[int, str]]] = {}
+        self._stats_key: tuple[int, int] | None = None
+        self._stats: dict[int, str] = {}
+        self._macs: tuple[str, ...] = ()
+        self._blocks: tuple[str, ...] = ("",) * len(FAMILIES)
+
+    def _device_values(self, device: DeviceSnapshot) -> tuple[Any, ...]:
+        """Return everything the samples of a device show."""
+        return (
+            device.name,
+            device.model,
+            device.rx_bytes,
+            device.tx_bytes,
+            device.ac_power,
+            device.outlets,
+            self.coordinator.device_available(device.mac),
+        )
+
+    def _device_samples(self, device: DeviceSnapshot) -> dict[int, str]:
+        """Return the sample lines of a device by family index."""
+        labels = _labels(
+            controller=self.controller,
+            mac=device.mac,
+            name=device.name or device.mac,
+            model=device.model or "",
+        )
+        up = int(self.coordinator.device_available(device.mac))
+        samples = {FAMILY_INDEX["unifi_device_up"]: f"unifi_device_up{labels} {up}\n"}
+        if device.rx_bytes is not None:
+            samples[FAMILY_INDEX["unifi_uplink_receive_bytes"]] = (
+                f"unifi_uplink_receive_bytes_total{labels} {device.rx_bytes}\n"
+            )
+            samples[FAMILY_INDEX["unifi_uplink_transmit_bytes"]] = (
+                f"unifi_uplink_transmit_bytes_total{labels} {device.tx_bytes}\n"
+            )
+        if device.ac_power is not None:
+            samples[FAMILY_INDEX["unifi_pdu_power_watts"]] = (
+                f"unifi_pdu_power_watts{labels} {_number(device.ac_power)}\n"
+            )
+        if outlets := [outlet for outlet in device.outlets if outlet.power is not None]:
+            samples[FAMILY_INDEX["unifi_outlet_power_watts"]] = "".join(
+                "unifi_outlet_power_watts"
+                + _labels(
+                    controller=self.controller,
+                    mac=device.mac,
+                    outlet=outlet.index,
+                    name=outlet.name,
+                )
+                + f" {_number(outlet.power)}\n"
+                for outlet in outlets
+            )
+        return samples
+
+    def _stats_samples(self) -> dict[int, str]:
+        """Return the sample lines of the poll statistics by family index."""
+        stats = self.coordinator.stats
+        labels = {"controller": self.controller}
+        label_set = _labels(**labels)
+        return {
+            FAMILY_INDEX["unifi_polls"]: (
+                f"unifi_polls_total{label_set} {stats.polls}\n"
+            ),
+            FAMILY_INDEX["unifi_poll_failures"]: (
+                f"unifi_poll_failures_total{label_set} {stats.failures}\n"
+            ),
+            FAMILY_INDEX["unifi_poll_received_bytes"]: (
+                f"unifi_poll_received_bytes_total{label_set} {stats.bytes_received}\n"
+            ),
+            FAMILY_INDEX["unifi_poll_duration_seconds"]: _histogram(
+                "unifi_poll_duration_seconds", labels, stats.poll_latency
+            ),
+            FAMILY_INDEX["unifi_poll_parse_seconds"]: _histogram(
+                "unifi_poll_parse_seconds", labels, stats.parse_time
+            ),
+        }
+
+    @callback
+    def blocks(self) -> tuple[str, ...]:
+        """Return the sample lines of every family, formatting what changed."""
+        coordinator = self.coordinator
+        if coordinator.data is None:
+            return self._blocks
+        changed = False
+        macs = tuple(coordinator.macs)
+        if macs != self._macs:
+            self._macs = macs
+            for mac in [mac for mac in self._devices if mac not in macs]:
+                del self._devices[mac]
+            changed = True
+        for mac in macs:
+            device = coordinator.data[mac]
+            values = self._device_values(device)
+            if (cached := self._devices.get(mac)) is None or cached[0] != values:
+                self._devices[mac] = (values, self._device_samples(device))
+                changed = True
+        stats_key = (coordinator.stats.polls, coordinator.stats.failures)
+        if stats_key != self._stats_key:
+            self._stats_key = stats_key
+            self._stats = self._stats_samples()
+            changed = True
+        if changed:
+            self._blocks = tuple(
+                "".join(
+                    [self._devices[mac][1].get(index, "") for mac in macs]
+                    + [self._stats.get(index, "")]
+                )
+                for index in range(len(FAMILIES))
+            )
+        return self._blocks
+
+
+def render(blocks: Iterable[tuple[str, ...]]) -> bytes:
+    """Return the exposition of the given exporters' blocks."""
+    blocks = list(blocks)
+    families = [
+        header + "".join(exporter[index] for exporter in blocks)
+        for index, header in enumerate(HEADERS)
+    ]
+    return ("".join(families) + "# EOF\n").encode()
+
+
+class MetricsView(HomeAssistantView):
+    """Serve the data of every controller as OpenMetrics text.
+
+    The body is kept between scrapes and only rendered again when an
+    exporter returns new blocks.
+    """
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self.hass = hass
+        self._blocks: list[tuple[str, ...]] = []
+        self._body = render(())
+
+    def _exporters(self) -> list[MetricsExporter]:
+        """Return the exporters of the pollers that are running."""
+        tasks = self.hass.data.get(DOMAIN, {}).get(DATA_POLLERS, {})
+        return [
+            task.result().metrics
+            for task in tasks.values()
+            if task.done() and not task.cancelled() and task.exception() is None
+        ]
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the current exposition."""
+        blocks = [exporter.blocks() for exporter in self._exporters()]
+        if len(blocks) != len(self._blocks) or any(
+            new is not old for new, old in zip(blocks, self._blocks)
+        ):
+            self._blocks = blocks
+            self._body = render(blocks)
+        return web.Response(
+            body=self._body,
+            status=HTTPStatus.OK,
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+
+@callback
+def async_register_metrics_view(hass: HomeAssistant) -> None:
+    """Register the metrics view once, if Home Assistant serves HTTP."""
+    if "http" in hass.config.components and not hass.data[DOMAIN].get(
+        DATA_METRICS_VIEW
+    ):
+        hass.data[DOMAIN][DATA_METRICS_VIEW] = True
+        hass.http.register_view(MetricsView(hass))
@@ -1,13 +1,16 @@
 """Module-level docstring describing the purpose of the module."""
 
-from collections.abc import Callable
+from array import array
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass
 from typing import Any
 
 from homeassistant.components.sensor import SensorEntityDescription
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from pyunifi.controller import Controller
+
+from .api import UnifiClient
+from .const import SWITCH_MODELS
 
 
 @dataclass
@@ -15,7 +18,38 @@ class BetterUnifiData:
     """Data for the Unifi Network Poller integration."""
 
     coordinator: DataUpdateCoordinator
-    api: Controller
+    api: UnifiClient
+    clients: DataUpdateCoordinator | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class WritePolicy:
+    """When a sensor writes a new value to the state machine.
+
+    Changes within the absolute or relative deadband are held back, as are
+    writes sooner than ``min_interval`` seconds after the previous one. A
+    held back value is still written once ``heartbeat`` seconds have passed.
+    """
+
+    absolute: float = 0.0
+    relative: float = 0.0
+    min_interval: float = 0.0
+    heartbeat: float = 0.0
+
+    def should_write(self, previous: Any, value: Any, elapsed: float) -> bool:
+        """Return whether to write ``value`` ``elapsed`` seconds after the last write."""
+        if value == previous:
+            return False
+        if elapsed < self.min_interval:
+            return False
+        if not isinstance(value, (int, float)) or not isinstance(
+            previous, (int, float)
+        ):
+            return True
+        change = abs(value - previous)
+        if change <= self.absolute or change <= self.relative * abs(previous):
+            return 0 < self.heartbeat <= elapsed
+        return True
 
 
 @dataclass(frozen=True)
@@ -24,6 +58,9 @@ class MyDescriptions:
     name_fn: Callable[[], str | None]
     value_fn: Callable[[Any, str], float | str | None]
     unique_id_fn: Callable[[str], str]
+    write_policy_fn: Callable[[Mapping[str, Any]], WritePolicy]
+    # Top-level stat/device fields the value is read from.
+    payload_keys: tuple[str, ...]
 
 
 @dataclass(frozen=True)
@@ -32,6 +69,38 @@ class MyOutletDescriptions:
     name_fn: Callable[[str], str | None]
     value_fn: Callable[[Any], float | str | None]
     unique_id_fn: Callable[[str, int], str]
+    write_policy_fn: Callable[[Mapping[str, Any]], WritePolicy]
+    # Top-level stat/device fields the value is read from.
+    payload_keys: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class MyPortDescriptions:
+    device_info_fn: Callable[[Any, str], DeviceInfo | None]
+    name_fn: Callable[[str], str | None]
+    value_fn: Callable[[Any, int], float | int | None]
+    unique_id_fn: Callable[[str, int], str]
+    write_policy_fn: Callable[[Mapping[str, Any]], WritePolicy]
+    # Top-level stat/device fields the value is read from.
+    payload_keys: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class MyStatsDescriptions:
+    device_info_fn: Callable[[str], DeviceInfo | None]
+    name_fn: Callable[[], str | None]
+    value_fn: Callable[[Any], float | int | None]
+    # Called with the entry ID.
+    unique_id_fn: Callable[[str], str]
+
+
+@dataclass(frozen=True)
+class MyClientDescriptions:
+    device_info_fn: Callable[[str, str | None], DeviceInfo | None]
+    name_fn: Callable[[], str | None]
+    value_fn: Callable[[Any, int], float | None]
+    # Called with the entry ID and the client's MAC.
+    unique_id_fn: Callable[[str, str], str]
 
 
 @dataclass(frozen=True)
@@ -42,3 +111,180 @@ class MySensorEntityDescription(SensorEntityDescription, MyDescriptions):
 @dataclass(frozen=True)
 class MyOutletSensorEntityDescription(SensorEntityDescription, MyOutletDescriptions):
     """Class describing UniFi sensor entity."""
+
+
+@dataclass(frozen=True)
+class MyPortSensorEntityDescription(SensorEntityDescription, MyPortDescriptions):
+    """Class describing UniFi switch port sensor entity."""
+
+
+@dataclass(frozen=True)
+class MyClientSensorEntityDescription(SensorEntityDescription, MyClientDescriptions):
+    """Class describing a UniFi client sensor entity."""
+
+
+@dataclass(frozen=True)
+class MyStatsSensorEntityDescription(SensorEntityDescription, MyStatsDescriptions):
+    """Class describing a UniFi poll statistics sensor entity."""
+
+
+@dataclass(frozen=True)
+class PollGroup:
+    """Class describing a set of device models polled on a shared schedule."""
+
+    name: str
+    models: tuple[str, ...]
+    interval: float
+    min_interval: float
+    max_interval: float
+    signal_fn: Callable[[Any], float]
+    threshold: float
+    # Top-level stat/device fields the signal is read from.
+    payload_keys: tuple[str, ...] = ()
+    # Whether uplink rates come from stat/health between full device fetches.
+    health: bool = False
+
+
+@dataclass(slots=True)
+class DeviceFailure:
+    """Consecutive failed requests of one device and when to retry it."""
+
+    count: int
+    retry_at: float
+    error: str
+
+
+@dataclass(slots=True)
+class OutletSnapshot:
+    """The fields of a PDU outlet that the outlet sensors read."""
+
+    index: int
+    name: str
+    # None until polled, e.g. when restored from the cached topology.
+    power: float | None
+
+    @classmethod
+    def from_payload(cls, outlet: dict[str, Any]) -> "OutletSnapshot":
+        """Project an outlet_table entry."""
+        power = outlet.get("outlet_power")
+        return cls(
+            index=outlet["index"],
+            name=outlet["name"],
+            power=float(power) if power is not None else None,
+        )
+
+
+@dataclass(slots=True)
+class PortTable:
+    """The port_table of a device, with the byte counters packed into arrays."""
+
+    indexes: tuple[int, ...]
+    names: tuple[str, ...]
+    rx_bytes: array
+    tx_bytes: array
+
+    @classmethod
+    def from_payload(cls, port_table: list[dict[str, Any]]) -> "PortTable":
+        """Project a port_table."""
+        return cls(
+            indexes=tuple(port["port_idx"] for port in port_table),
+            names=tuple(
+                port.get("name", f"Port {port['port_idx']}") for port in port_table
+            ),
+            rx_bytes=array("q", [port.get("rx_bytes", 0) for port in port_table]),
+            tx_bytes=array("q", [port.get("tx_bytes", 0) for port in port_table]),
+        )
+
+
+@dataclass(slots=True)
+class DeviceSnapshot:
+    """The fields of a stat/device payload that the integration reads.
+
+    Payloads also carry port, radio and config tables; projecting them into
+    this object right after parsing lets the raw payload be released.
+    """
+
+    mac: str
+    name: str | None
+    model: str | None
+    received: float
+    rx_bytes: int | None = None
+    tx_bytes: int | None = None
+    rx_rate: float = 0.0
+    tx_rate: float = 0.0
+    ac_power: float | None = None
+    outlets: tuple[OutletSnapshot, ...] = ()
+    ports: PortTable | None = None
+    # Set while the device's requests fail and this is its last good data.
+    stale: bool = False
+
+    @classmethod
+    def from_payload(cls, device: dict[str, Any], received: float) -> "DeviceSnapshot":
+        """Project a stat/device payload received at the given monotonic time."""
+        snapshot = cls(
+            mac=device["mac"],
+            name=device.get("name"),
+            model=device.get("model"),
+            received=received,
+        )
+        snapshot.apply_payload(device, received)
+        return snapshot
+
+    def apply_payload(self, device: dict[str, Any], received: float) -> None:
+        """Update the snapshot from a full or partial device payload.
+
+        Fields missing from the payload keep their current value, so the
+        incremental device:sync messages of the event stream can be applied.
+        """
+        self.received = received
+        if "name" in device:
+            self.name = device["name"]
+        if "model" in device:
+            self.model = device["model"]
+        if (uplink := device.get("uplink")) is not None and "rx_bytes" in uplink:
+            self.rx_bytes = uplink["rx_bytes"]
+            self.tx_bytes = uplink.get("tx_bytes", self.tx_bytes)
+            self.rx_rate = uplink.get("rx_bytes-r", self.rx_rate)
+            self.tx_rate = uplink.get("tx_bytes-r", self.tx_rate)
+        if (ac_power := device.get("outlet_ac_power_consumption")) is not None:
+            self.ac_power = float(ac_power)
+        if outlet_table := device.get("outlet_table"):
+            self.outlets = tuple(
+                OutletSnapshot.from_payload(outlet) for outlet in outlet_table
+            )
+        # Only switches have port sensors; other devices' ports are dropped.
+        if (port_table := device.get("port_table")) and self.model in SWITCH_MODELS:
+            self.ports = PortTable.from_payload(port_table)
+
+    def apply_health(self, wan: dict[str, Any], received: float) -> None:
+        """Update the uplink rates from the site's wan health subsystem.
+
+        The summary carries no byte counters; those keep their value until
+        the next full device fetch.
+        """
+        self.received = received
+        self.rx_rate = float(wan.get("rx_bytes-r", 0.0))
+        self.tx_rate = float(wan.get("tx_bytes-r", 0.0))
+
+    def topology(self) -> dict[str, Any]:
+        """Return the identifying fields as a minimal stat/device payload.
+
+        The result is what entities are created from; it can be cached and
+        turned back into a snapshot with ``from_payload``.
+        """
+        return {
+            "mac": self.mac,
+            "name": self.name,
+            "model": self.model,
+            "outlet_table": [
+                {"index": outlet.index, "name": outlet.name} for outlet in self.outlets
+            ],
+            "port_table": (
+                [
+                    {"port_idx": index, "name": name}
+                    for index, name in zip(self.ports.indexes, self.ports.names)
+                ]
+                if self.ports is not None
+                else []
+            ),
+        }
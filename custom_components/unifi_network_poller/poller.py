@@ -0,0 +1,475 @@
+"""Controller login and poll engines shared by config entries."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import timedelta
+import logging
+from typing import Any
+
+from aiohttp import CookieJar
+from homeassistant.config_entries import ConfigEntry, current_entry
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_HOMEASSISTANT_CLOSE,
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .api import DEFAULT_SITE, UnifiClient, UnifiError
+from .clients import ClientCoordinator
+from .const import (
+    BACKFILL_INTERVAL,
+    CONF_SITE,
+    DATA_HUBS,
+    DATA_POLLERS,
+    DEFAULT_GATEWAY_FULL_FETCH_INTERVAL,
+    DISCOVERY_INTERVAL,
+    DOMAIN,
+    SESSION_STORAGE_KEY,
+    SIGNAL_DEVICES_ADDED,
+    STORAGE_VERSION,
+    TOPOLOGY_STORAGE_KEY,
+)
+from .coordinator import SUPPORTED_MODELS, MyCoordinator
+from .metrics import MetricsExporter
+from .models import DeviceSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait before persisting a new session, batching back-to-back logins.
+SESSION_SAVE_DELAY = 1
+
+
+def hub_key(data: dict[str, Any]) -> str:
+    """Return the key shared by config entries for the same host and user."""
+    return slugify(f"{data[CONF_HOST]} {data[CONF_USERNAME]}")
+
+
+def poller_key(data: dict[str, Any]) -> str:
+    """Return the key shared by config entries for the same host, user and site.
+
+    The default site is left out, so its stores keep the keys they had before
+    sites could be configured.
+    """
+    key = f"{data[CONF_HOST]} {data[CONF_USERNAME]}"
+    if (site := data.get(CONF_SITE, DEFAULT_SITE)) != DEFAULT_SITE:
+        key = f"{key} {site}"
+    return slugify(key)
+
+
+def session_store(hass: HomeAssistant, key: str) -> Store:
+    """Return the store holding the controller session of a hub key."""
+    return Store(hass, STORAGE_VERSION, SESSION_STORAGE_KEY.format(key=key))
+
+
+def topology_store(hass: HomeAssistant, key: str) -> Store:
+    """Return the store holding a poller's discovered devices."""
+    return Store(hass, STORAGE_VERSION, TOPOLOGY_STORAGE_KEY.format(key=key))
+
+
+async def async_get_hub(
+    hass: HomeAssistant, data: dict[str, Any], store: Store | None = None
+) -> UnifiClient:
+    """Return a logged in hub object based on the user input.
+
+    The session is not tied to a config entry; whoever creates the hub detaches
+    it. With a store, a still valid cached session replaces the login round
+    trip and every new session is written back to it.
+    """
+    session = async_create_clientsession(
+        hass, verify_ssl=False, auto_cleanup=False, cookie_jar=CookieJar(unsafe=True)
+    )
+    hub = UnifiClient(
+        session,
+        data[CONF_HOST],
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+        site=data.get(CONF_SITE, DEFAULT_SITE),
+    )
+    try:
+        if store is None:
+            await hub.async_login()
+            return hub
+
+        hub.on_session_change = lambda: store.async_delay_save(
+            lambda: hub.session_state, SESSION_SAVE_DELAY
+        )
+        if not hub.restore_session(await store.async_load() or {}):
+            await hub.async_login()
+    except BaseException:
+        session.detach()
+        raise
+    return hub
+
+
+@callback
+def async_retire_devices(
+    hass: HomeAssistant, entry: ConfigEntry, macs: list[str]
+) -> None:
+    """Remove the entities of the given devices and any devices left empty.
+
+    Every unique ID of this integration ends with the MAC of the device
+    the entity reads from.
+    """
+    entity_registry = er.async_get(hass)
+    for entity in er.async_entries_for_config_entry(entity_registry, entry.entry_id):
+        if entity.unique_id.rsplit("-", 1)[-1] in macs:
+            entity_registry.async_remove(entity.entity_id)
+
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if not er.async_entries_for_device(
+            entity_registry, device.id, include_disabled_entities=True
+        ):
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
+
+
+class SharedLogin:
+    """The logged in client of one host and user, and how many pollers use it."""
+
+    def __init__(self, task: asyncio.Task[UnifiClient]) -> None:
+        """Initialize the login while ``task`` logs in."""
+        self.task = task
+        self.users = 0
+
+
+class SharedPoller:
+    """The coordinator of one host, user and site.
+
+    Every config entry for the same site acquires the same poller, so the
+    controller sees one request per poll however many entries read it. The
+    entries' entities all listen on the shared coordinator, which fans each
+    poll out to them. Pollers of the host's other sites share its login. The
+    poller is shut down when the last entry releases it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: str,
+        hub: UnifiClient,
+        coordinator: MyCoordinator,
+        store: Store,
+        topology: dict[str, Any],
+        restored: bool,
+    ) -> None:
+        """Initialize the poller."""
+        self.hass = hass
+        self.key = key
+        self.hub = hub
+        self.coordinator = coordinator
+        # Only polls while an entry tracks clients.
+        self.clients = ClientCoordinator(hass, hub)
+        self.metrics = MetricsExporter(coordinator, hub.scope)
+        self.entries: set[str] = set()
+        # The entries that want the event stream followed.
+        self.push_entries: set[str] = set()
+        # The gateway full fetch interval each entry asks for.
+        self.full_fetch_intervals: dict[str, float] = {}
+        self._store = store
+        self._topology = topology
+        # Set while the data still comes from the cached topology.
+        self.restored = restored
+        self._push_task: asyncio.Task | None = None
+        self._backfill_task: asyncio.Task | None = None
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_start(self) -> None:
+        """Start background discovery and, with the recorder, statistics import."""
+        if "recorder" in self.hass.config.components:
+            self.async_backfill()
+            self._unsubs.append(
+                async_track_time_interval(
+                    self.hass,
+                    self.async_backfill,
+                    timedelta(seconds=BACKFILL_INTERVAL),
+                    name=f"{DOMAIN} statistics backfill",
+                    cancel_on_shutdown=True,
+                )
+            )
+        self._unsubs.append(
+            async_track_time_interval(
+                self.hass,
+                self.async_discover,
+                timedelta(seconds=DISCOVERY_INTERVAL),
+                name=f"{DOMAIN} discovery",
+                cancel_on_shutdown=True,
+            )
+        )
+        self._unsubs.append(
+            self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_CLOSE, self._async_close_session
+            )
+        )
+
+    @callback
+    def async_go_live(self) -> None:
+        """List and poll the controller to replace the cached topology and data.
+
+        Called once the platforms listen for added devices.
+        """
+        if self.restored:
+            self.restored = False
+            self.hass.async_create_background_task(
+                self._async_go_live(), f"{DOMAIN} startup discovery"
+            )
+
+    async def _async_go_live(self) -> None:
+        await self.async_discover()
+        await self.coordinator.async_refresh()
+
+    async def async_discover(self, _now: Any = None) -> None:
+        """Pick up added and removed devices without reloading any entry."""
+        try:
+            added, removed = await self.coordinator.async_discover()
+        except UnifiError as err:
+            _LOGGER.debug("Device discovery failed: %s", err)
+            return
+        for entry_id in self.entries:
+            if removed and (
+                entry := self.hass.config_entries.async_get_entry(entry_id)
+            ):
+                async_retire_devices(self.hass, entry, removed)
+            if added:
+                async_dispatcher_send(
+                    self.hass, SIGNAL_DEVICES_ADDED.format(entry_id=entry_id), added
+                )
+        if removed:
+            _LOGGER.info("Retired devices no longer on the controller: %s", removed)
+        if added:
+            _LOGGER.info("Added devices found on the controller: %s", added)
+        topology = {"devices": self.coordinator.topology}
+        if topology != self._topology:
+            self._topology = topology
+            self._store.async_delay_save(lambda: topology)
+
+    @callback
+    def async_backfill(self, _now: Any = None) -> None:
+        """Fill statistics gaps from the gateways' reports, unless already running."""
+        if self._backfill_task is None or self._backfill_task.done():
+            self._backfill_task = self.hass.async_create_background_task(
+                self._async_backfill(), f"{DOMAIN} statistics backfill"
+            )
+
+    async def _async_backfill(self) -> None:
+        # Imported here so the recorder stays an optional dependency.
+        from .backfill import async_backfill_statistics
+
+        coordinator = self.coordinator
+        gateways = [
+            coordinator.data[mac]
+            for mac in coordinator.macs
+            if coordinator.data[mac].model == "UDMPROSE"
+        ]
+        try:
+            await async_backfill_statistics(self.hass, self.hub, gateways)
+        except UnifiError as err:
+            _LOGGER.debug("Statistics backfill failed: %s", err)
+
+    @callback
+    def async_start_push(self, entry_id: str) -> None:
+        """Follow the event stream for the entry, unless it already is."""
+        self.push_entries.add(entry_id)
+        if self._push_task is None:
+            self._push_task = self.hass.async_create_background_task(
+                self.coordinator.async_push_loop(), f"{DOMAIN} event stream"
+            )
+
+    @callback
+    def async_stop_push(self, entry_id: str) -> None:
+        """Stop following the event stream once no entry wants it.
+
+        Polling then returns to its own schedule right away instead of after
+        the reconciliation interval.
+        """
+        self.push_entries.discard(entry_id)
+        if self.push_entries or self._push_task is None:
+            return
+        self._push_task.cancel()
+        self._push_task = None
+        self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    @callback
+    def async_set_full_fetch_interval(
+        self, entry_id: str, interval: float | None
+    ) -> None:
+        """Set or, with None, drop the entry's gateway full fetch interval.
+
+        Gateways are fetched in full as often as the most demanding entry
+        asks for.
+        """
+        if interval is None:
+            self.full_fetch_intervals.pop(entry_id, None)
+        else:
+            self.full_fetch_intervals[entry_id] = interval
+        self.coordinator.full_fetch_interval = min(
+            self.full_fetch_intervals.values(),
+            default=DEFAULT_GATEWAY_FULL_FETCH_INTERVAL,
+        )
+
+    async def async_shutdown(self) -> None:
+        """Stop polling; the login is released separately."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs.clear()
+        for task in (self._push_task, self._backfill_task):
+            if task is not None:
+                task.cancel()
+        self._push_task = self._backfill_task = None
+        await self.coordinator.async_shutdown()
+        await self.clients.async_shutdown()
+
+    @callback
+    def _async_close_session(self, _event: Any) -> None:
+        """Detach the session when Home Assistant closes without unloading."""
+        self.hub.session.detach()
+
+
+async def async_acquire_hub(hass: HomeAssistant, data: dict[str, Any]) -> UnifiClient:
+    """Return a client for the data's site on the login of its host and user.
+
+    The first caller logs in, or restores the cached session; the pollers of
+    every site then share that session and login.
+    """
+    logins: dict[str, SharedLogin] = hass.data[DOMAIN].setdefault(DATA_HUBS, {})
+    key = hub_key(data)
+    if (login := logins.get(key)) is None:
+        login = logins[key] = SharedLogin(
+            hass.async_create_task(async_get_hub(hass, data, session_store(hass, key)))
+        )
+    login.users += 1
+    try:
+        hub = await asyncio.shield(login.task)
+    except Exception:
+        # The login failed; the next caller tries again.
+        login.users -= 1
+        if logins.get(key) is login:
+            del logins[key]
+        raise
+    return hub.for_site(data.get(CONF_SITE, DEFAULT_SITE))
+
+
+@callback
+def async_release_hub(hass: HomeAssistant, data: dict[str, Any]) -> None:
+    """Release a client from ``async_acquire_hub``; the last detaches the session."""
+    logins: dict[str, SharedLogin] = hass.data[DOMAIN][DATA_HUBS]
+    key = hub_key(data)
+    login = logins[key]
+    login.users -= 1
+    if not login.users:
+        del logins[key]
+        login.task.result().session.detach()
+
+
+async def _async_create_poller(
+    hass: HomeAssistant, key: str, data: dict[str, Any]
+) -> SharedPoller:
+    """Connect to the controller and create the poller for ``key``.
+
+    With a cached topology the coordinator is seeded from it and the
+    controller is only listed and polled in the background.
+    """
+    store = topology_store(hass, key)
+    cached = await store.async_load()
+    restored = cached is not None
+    hub = await async_acquire_hub(hass, data)
+    try:
+        if restored:
+            devices = [
+                DeviceSnapshot.from_payload(device, 0.0) for device in cached["devices"]
+            ]
+            coordinator = MyCoordinator(hass, hub, [device.mac for device in devices])
+            coordinator.async_seed(devices)
+        else:
+            aps = await hub.async_get_devices()
+            macs = [ap["mac"] for ap in aps if ap["model"] in SUPPORTED_MODELS]
+            coordinator = MyCoordinator(hass, hub, macs)
+            await coordinator.async_config_entry_first_refresh()
+            cached = {"devices": coordinator.topology}
+            store.async_delay_save(lambda: cached)
+    except BaseException:
+        async_release_hub(hass, data)
+        raise
+
+    poller = SharedPoller(hass, key, hub, coordinator, store, cached, restored)
+    poller.async_start()
+    return poller
+
+
+async def async_acquire_poller(hass: HomeAssistant, entry: ConfigEntry) -> SharedPoller:
+    """Return the poller for the entry's site, creating it on first use.
+
+    Entries set up at the same time wait for a single creation instead of
+    each connecting on their own.
+    """
+    pollers: dict[str, asyncio.Task[SharedPoller]] = hass.data[DOMAIN].setdefault(
+        DATA_POLLERS, {}
+    )
+    key = poller_key(entry.data)
+    if (task := pollers.get(key)) is None:
+        # Created outside the entry's context, so the coordinators are not
+        # tied to the entry that happened to come first: they would shut down
+        # when it unloads. Releasing the last entry shuts them down instead.
+        token = current_entry.set(None)
+        try:
+            task = pollers[key] = hass.async_create_task(
+                _async_create_poller(hass, key, dict(entry.data))
+            )
+        finally:
+            current_entry.reset(token)
+    try:
+        poller = await asyncio.shield(task)
+    except Exception:
+        if pollers.get(key) is task:
+            del pollers[key]
+        raise
+    poller.entries.add(entry.entry_id)
+    return poller
+
+
+async def async_release_poller(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Release the entry's poller and shut it down if no entry is left."""
+    pollers: dict[str, asyncio.Task[SharedPoller]] = hass.data[DOMAIN][DATA_POLLERS]
+    key = poller_key(entry.data)
+    poller = pollers[key].result()
+    poller.entries.discard(entry.entry_id)
+    if not poller.entries:
+        del pollers[key]
+        await poller.async_shutdown()
+        async_release_hub(hass, entry.data)
+    else:
+        poller.async_stop_push(entry.entry_id)
+        poller.async_set_full_fetch_interval(entry.entry_id, None)
+
+
+def poller_in_use(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Return whether another config entry shares the entry's poller."""
+    return _shares_key(hass, entry, poller_key)
+
+
+def hub_in_use(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Return whether another config entry shares the entry's login."""
+    return _shares_key(hass, entry, hub_key)
+
+
+def _shares_key(
+    hass: HomeAssistant, entry: ConfigEntry, key_fn: Callable[[dict[str, Any]], str]
+) -> bool:
+    key = key_fn(entry.data)
+    return any(
+        key_fn(other.data) == key
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    )
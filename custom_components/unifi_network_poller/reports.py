@@ -0,0 +1,73 @@
+"""Turn the controller's hourly report rows into statistics.
+
+Kept apart from the import itself, which needs the recorder loaded.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util import dt as dt_util
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import StatisticData
+
+# Gateway report attributes and the unique ID prefix of the counter sensor
+# whose statistics they fill.
+GATEWAY_REPORT_ATTRS = (
+    ("wan-rx_bytes", "rx"),
+    ("wan-tx_bytes", "tx"),
+)
+
+HOUR = timedelta(hours=1)
+
+
+def hourly_totals(rows: Iterable[dict[str, Any]], attr: str) -> dict[datetime, float]:
+    """Return the total of a report attribute by the start of its hour."""
+    totals: dict[datetime, float] = {}
+    for row in rows:
+        if (value := row.get(attr)) is None:
+            continue
+        hour = dt_util.utc_from_timestamp(row["time"] / 1000).replace(
+            minute=0, second=0, microsecond=0
+        )
+        totals[hour] = totals.get(hour, 0.0) + value
+    return totals
+
+
+def gap_statistics(
+    existing: list[tuple[datetime, float]],
+    totals: dict[datetime, float],
+    since: datetime,
+) -> list[StatisticData]:
+    """Return statistics for the hours missing before the last recorded one.
+
+    ``existing`` holds the start and sum of the recorded hourly statistics
+    from ``since`` on, in order. The sum of each missing hour is counted back
+    from the next recorded hour with the report totals in between, hours
+    without a report counting as 0, so the recorded sums stay as they are.
+    Within the series, sums never drop below the hour before the gap; before
+    its first hour, they reach back to ``since``. Hours after the last
+    recorded one are left to the recorder. Without totals, the result just
+    lists the missing hours.
+    """
+    statistics: list[StatisticData] = []
+    previous: tuple[datetime, float] | None = None
+    for start, recorded in existing:
+        if previous is None:
+            first, floor = since, None
+        else:
+            first, floor = previous[0] + HOUR, previous[1]
+        gap: list[StatisticData] = []
+        total, hour = recorded, start - HOUR
+        while hour >= first:
+            total -= totals.get(hour + HOUR, 0.0)
+            gap.append(
+                {"start": hour, "sum": total if floor is None else max(total, floor)}
+            )
+            hour -= HOUR
+        statistics.extend(reversed(gap))
+        previous = (start, recorded)
+    return statistics
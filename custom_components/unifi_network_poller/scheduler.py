@@ -0,0 +1,89 @@
+"""Adaptive polling schedule for groups of controller devices."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+import random
+
+from .const import POLL_JITTER, POLL_MIN_DELAY, POLL_RELAX_FACTOR, POLL_TIGHTEN_FACTOR
+from .models import PollGroup
+
+
+class _GroupState:
+    """Mutable schedule of a single poll group."""
+
+    __slots__ = ("group", "interval", "next_due", "failures")
+
+    def __init__(self, group: PollGroup) -> None:
+        self.group = group
+        self.interval = group.interval
+        self.next_due = 0.0
+        self.failures = 0
+
+
+class PollScheduler:
+    """Decide which poll groups are due and when the next refresh should run.
+
+    A group polls faster while its values are moving and relaxes back to its
+    base interval once they settle. Failures back off exponentially up to the
+    group's maximum interval. Every delay is jittered so several instances
+    pointing at the same controller drift apart instead of polling in lockstep.
+    """
+
+    def __init__(
+        self,
+        groups: Iterable[PollGroup],
+        jitter: float = POLL_JITTER,
+        rng: random.Random | None = None,
+    ) -> None:
+        """Initialize the scheduler with every group due immediately."""
+        self._states = {group.name: _GroupState(group) for group in groups}
+        self._jitter = jitter
+        self._rng = rng or random.Random()
+
+    def _jittered(self, delay: float) -> float:
+        return delay * (1 + self._rng.uniform(-self._jitter, self._jitter))
+
+    @property
+    def groups(self) -> tuple[str, ...]:
+        """Return the names of the scheduled groups."""
+        return tuple(self._states)
+
+    def interval(self, name: str) -> float:
+        """Return the current, unjittered interval of a group."""
+        return self._states[name].interval
+
+    def expire(self) -> None:
+        """Make every group due on the next refresh."""
+        for state in self._states.values():
+            state.next_due = 0.0
+
+    def due(self, now: float) -> set[str]:
+        """Return the names of the groups that should be polled now."""
+        return {name for name, state in self._states.items() if state.next_due <= now}
+
+    def succeeded(self, name: str, now: float, moving: bool) -> None:
+        """Reschedule a group after a successful poll."""
+        state = self._states[name]
+        group = state.group
+        state.failures = 0
+        if moving:
+            state.interval = max(
+                group.min_interval, state.interval * POLL_TIGHTEN_FACTOR
+            )
+        else:
+            state.interval = min(group.interval, state.interval * POLL_RELAX_FACTOR)
+        state.next_due = now + self._jittered(state.interval)
+
+    def failed(self, name: str, now: float) -> None:
+        """Reschedule a group after a failed poll, backing off exponentially."""
+        state = self._states[name]
+        group = state.group
+        state.failures += 1
+        backoff = min(group.max_interval, group.interval * 2**state.failures)
+        state.next_due = now + self._jittered(backoff)
+
+    def next_delay(self, now: float) -> float:
+        """Return the number of seconds until the next group is due."""
+        next_due = min(state.next_due for state in self._states.values())
+        return max(POLL_MIN_DELAY, next_due - now)
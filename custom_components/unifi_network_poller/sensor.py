@@ -1,10 +1,13 @@
 """Example integration using DataUpdateCoordinator."""
 
+from collections.abc import Mapping
 import logging
 import re
+import time
 from typing import Any
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
     SensorStateClass,
@@ -12,28 +15,58 @@ from homeassistant.components.sensor import (
 from homeassistant.const import (
     EntityCategory,
     UnitOfDataRate,
+    UnitOfEnergy,
     UnitOfInformation,
     UnitOfPower,
+    UnitOfTime,
 )
 from homeassistant.core import callback
-from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.device_registry import (
+    CONNECTION_NETWORK_MAC,
+    DeviceEntryType,
+    DeviceInfo,
+)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
-from .models import MyOutletSensorEntityDescription, MySensorEntityDescription
+from .const import (
+    CONF_DEVICES,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_MIN_WRITE_INTERVAL,
+    CONF_POWER_DEADBAND,
+    CONF_RATE_DEADBAND,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MIN_WRITE_INTERVAL,
+    DEFAULT_POWER_DEADBAND,
+    DEFAULT_RATE_DEADBAND,
+    DOMAIN,
+    SIGNAL_DEVICES_ADDED,
+    SWITCH_MODELS,
+)
+from .clients import tracked_clients
+from .coordinator import energy_context
+from .models import (
+    DeviceSnapshot,
+    MyClientSensorEntityDescription,
+    MyOutletSensorEntityDescription,
+    MyPortSensorEntityDescription,
+    MySensorEntityDescription,
+    MyStatsSensorEntityDescription,
+    WritePolicy,
+)
 
 _LOGGER = logging.getLogger(__name__)
 OUTLET_NAME_REGEX = r"^.*-PS.$"
 
 
 @callback
-def async_client_device_info_fn(data: Any, mac: str) -> DeviceInfo:
+def async_client_device_info_fn(data: DeviceSnapshot, mac: str) -> DeviceInfo:
     """Create device registry entry for client."""
     return DeviceInfo(
         identifiers={(DOMAIN, mac)},
-        name=data["name"],
+        name=data.name,
         manufacturer="Ubiquiti Networks",
-        model=data["model"],
+        model=data.model,
     )
 
 
@@ -47,54 +80,81 @@ def async_outlet_device_info_fn(udmpse_mac: str, name: str) -> DeviceInfo:
     )
 
 
+@callback
+def async_controller_device_info_fn(controller: str) -> DeviceInfo:
+    """Create device registry entry for the controller site polled by the entry."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, controller)},
+        name=f"UniFi controller {controller}",
+        manufacturer="Ubiquiti Networks",
+    )
+
+
+@callback
+def async_network_client_device_info_fn(mac: str, name: str | None) -> DeviceInfo:
+    """Create device registry entry for a tracked network client."""
+    return DeviceInfo(connections={(CONNECTION_NETWORK_MAC, mac)}, name=name or mac)
+
+
 @callback
 def async_rx_rate_val_fn(data: Any, mac: str) -> float:
-    """Calculate the asynchronous RX rate value based on the provided data and MAC address.
+    """Return the RX rate of a device's uplink as the controller reports it.
 
     Args:
-        data (Any): The data containing the previous and current values.
+        data (Any): The coordinator data holding the device snapshots.
         mac (str): The MAC address of the device.
 
     Returns:
-        float: The calculated RX rate value.
+        float: The RX rate in bytes per second.
     """
-    if "prev_data" in data:
-        prev_time = data["prev_data"]["time"]
-        prev_rx = data["prev_data"][mac]["uplink"]["rx_bytes"]
-        current_time = data["time"]
-        current_rx = data[mac]["uplink"]["rx_bytes"]
-        if current_rx < prev_rx:
-            # counter reset
-            prev_rx = 0
-        return (current_rx - prev_rx) / (current_time - prev_time)
-    else:
-        return 0.0
+    return data[mac].rx_rate
 
 
 @callback
 def async_tx_rate_val_fn(data: Any, mac: str) -> float:
-    """Calculate the asynchronous TX rate value based on the provided data and MAC address.
+    """Return the TX rate of a device's uplink as the controller reports it.
 
     Args:
-        data (Any): The data containing the previous and current values.
+        data (Any): The coordinator data holding the device snapshots.
         mac (str): The MAC address of the device.
 
     Returns:
-        float: The calculated TX rate value.
+        float: The TX rate in bytes per second.
     """
-    if "prev_data" in data:
-        prev_time = data["prev_data"]["time"]
-        prev_tx = data["prev_data"][mac]["uplink"]["tx_bytes"]
-        current_time = data["time"]
-        current_tx = data[mac]["uplink"]["tx_bytes"]
-        if current_tx < prev_tx:
-            # counter reset
-            prev_tx = 0
-        return (current_tx - prev_tx) / (current_time - prev_time)
-    else:
-        return 0.0
+    return data[mac].tx_rate
+
+
+@callback
+def async_counter_write_policy_fn(options: Mapping[str, Any]) -> WritePolicy:
+    """Write every counter change, subject to the minimum write interval."""
+    return WritePolicy(
+        min_interval=options.get(CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL),
+    )
+
+
+@callback
+def async_rate_write_policy_fn(options: Mapping[str, Any]) -> WritePolicy:
+    """Hold back rate changes smaller than the relative rate deadband."""
+    return WritePolicy(
+        relative=options.get(CONF_RATE_DEADBAND, DEFAULT_RATE_DEADBAND) / 100,
+        min_interval=options.get(CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL),
+        heartbeat=options.get(CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL),
+    )
+
 
+@callback
+def async_power_write_policy_fn(options: Mapping[str, Any]) -> WritePolicy:
+    """Hold back power changes smaller than the absolute power deadband."""
+    return WritePolicy(
+        absolute=options.get(CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND),
+        min_interval=options.get(CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL),
+        heartbeat=options.get(CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL),
+    )
 
+
+# The RX/TX counters of gateways only move with a full fetch. With a
+# gateway full fetch interval set, the health summary refreshes just the rate
+# sensors in between, so the counters' statistics step at that interval.
 GW_SENSORS: tuple[MySensorEntityDescription, ...] = (
     MySensorEntityDescription(
         key="Transfer sensor RX",
@@ -109,7 +169,9 @@ GW_SENSORS: tuple[MySensorEntityDescription, ...] = (
         device_info_fn=async_client_device_info_fn,
         name_fn=lambda: "RX",
         unique_id_fn=lambda mac: f"rx-{mac}",
-        value_fn=lambda data, mac: data[mac]["uplink"]["rx_bytes"],
+        value_fn=lambda data, mac: data[mac].rx_bytes,
+        write_policy_fn=async_counter_write_policy_fn,
+        payload_keys=("uplink",),
     ),
     MySensorEntityDescription(
         key="Transfer sensor TX",
@@ -124,7 +186,9 @@ GW_SENSORS: tuple[MySensorEntityDescription, ...] = (
         device_info_fn=async_client_device_info_fn,
         name_fn=lambda: "TX",
         unique_id_fn=lambda mac: f"tx-{mac}",
-        value_fn=lambda data, mac: data[mac]["uplink"]["tx_bytes"],
+        value_fn=lambda data, mac: data[mac].tx_bytes,
+        write_policy_fn=async_counter_write_policy_fn,
+        payload_keys=("uplink",),
     ),
     MySensorEntityDescription(
         key="Transfer sensor RX Rate",
@@ -140,6 +204,8 @@ GW_SENSORS: tuple[MySensorEntityDescription, ...] = (
         name_fn=lambda: "RX Rate",
         unique_id_fn=lambda mac: f"rx_rate-{mac}",
         value_fn=async_rx_rate_val_fn,
+        write_policy_fn=async_rate_write_policy_fn,
+        payload_keys=("uplink",),
     ),
     MySensorEntityDescription(
         key="Transfer sensor TX Rate",
@@ -155,6 +221,8 @@ GW_SENSORS: tuple[MySensorEntityDescription, ...] = (
         name_fn=lambda: "TX Rate",
         unique_id_fn=lambda mac: f"tx_rate-{mac}",
         value_fn=async_tx_rate_val_fn,
+        write_policy_fn=async_rate_write_policy_fn,
+        payload_keys=("uplink",),
     ),
 )
 
@@ -170,7 +238,26 @@ PDU_SENSORS: tuple[MySensorEntityDescription, ...] = (
         device_info_fn=async_client_device_info_fn,
         name_fn=lambda: "AC Power Consumption",
         unique_id_fn=lambda mac: f"ac_power_consumption-{mac}",
-        value_fn=lambda data, mac: data[mac]["outlet_ac_power_consumption"],
+        value_fn=lambda data, mac: data[mac].ac_power,
+        write_policy_fn=async_power_write_policy_fn,
+        payload_keys=("outlet_ac_power_consumption",),
+    ),
+)
+
+PDU_ENERGY_SENSORS: tuple[MySensorEntityDescription, ...] = (
+    MySensorEntityDescription(
+        key="PDU Energy",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=3,
+        has_entity_name=True,
+        device_info_fn=async_client_device_info_fn,
+        name_fn=lambda: "AC Energy",
+        unique_id_fn=lambda mac: f"ac_energy-{mac}",
+        value_fn=lambda data, mac: data["energy"][energy_context(mac)].kwh,
+        write_policy_fn=async_counter_write_policy_fn,
+        payload_keys=("outlet_ac_power_consumption",),
     ),
 )
 
@@ -185,9 +272,204 @@ OUTLET_SENSORS: tuple[MyOutletSensorEntityDescription, ...] = (
         has_entity_name=True,
         device_info_fn=async_outlet_device_info_fn,
         name_fn=lambda sensor: f"{sensor} AC Power Consumption",
-        unique_id_fn=lambda mac,
-        outlet_index: f"outlet_{outlet_index}_ac_power_consumption-{mac}",
-        value_fn=lambda data: data.get("outlet_power", 0.0),
+        unique_id_fn=lambda mac, outlet_index: f"outlet_{outlet_index}_ac_power_consumption-{mac}",
+        value_fn=lambda data: data.power,
+        write_policy_fn=async_power_write_policy_fn,
+        payload_keys=("outlet_table",),
+    ),
+)
+
+OUTLET_ENERGY_SENSORS: tuple[MyOutletSensorEntityDescription, ...] = (
+    MyOutletSensorEntityDescription(
+        key="Energy",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=3,
+        has_entity_name=True,
+        device_info_fn=async_outlet_device_info_fn,
+        name_fn=lambda sensor: f"{sensor} AC Energy",
+        unique_id_fn=lambda mac, outlet_index: f"outlet_{outlet_index}_ac_energy-{mac}",
+        value_fn=lambda meter: meter.kwh,
+        write_policy_fn=async_counter_write_policy_fn,
+        payload_keys=("outlet_table",),
+    ),
+)
+
+PORT_SENSORS: tuple[MyPortSensorEntityDescription, ...] = (
+    MyPortSensorEntityDescription(
+        key="Port RX",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_display_precision=2,
+        suggested_unit_of_measurement=UnitOfInformation.MEGABYTES,
+        icon="mdi:upload",
+        has_entity_name=True,
+        entity_registry_enabled_default=False,
+        device_info_fn=async_client_device_info_fn,
+        name_fn=lambda port: f"{port} RX",
+        unique_id_fn=lambda mac, port: f"port_{port}_rx-{mac}",
+        value_fn=lambda rates, slot: rates.rx_bytes[slot],
+        write_policy_fn=async_counter_write_policy_fn,
+        payload_keys=("port_table",),
+    ),
+    MyPortSensorEntityDescription(
+        key="Port TX",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_display_precision=2,
+        suggested_unit_of_measurement=UnitOfInformation.MEGABYTES,
+        icon="mdi:download",
+        has_entity_name=True,
+        entity_registry_enabled_default=False,
+        device_info_fn=async_client_device_info_fn,
+        name_fn=lambda port: f"{port} TX",
+        unique_id_fn=lambda mac, port: f"port_{port}_tx-{mac}",
+        value_fn=lambda rates, slot: rates.tx_bytes[slot],
+        write_policy_fn=async_counter_write_policy_fn,
+        payload_keys=("port_table",),
+    ),
+    MyPortSensorEntityDescription(
+        key="Port RX Rate",
+        device_class=SensorDeviceClass.DATA_RATE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.BYTES_PER_SECOND,
+        suggested_display_precision=2,
+        suggested_unit_of_measurement=UnitOfDataRate.MEGABITS_PER_SECOND,
+        icon="mdi:upload",
+        has_entity_name=True,
+        device_info_fn=async_client_device_info_fn,
+        name_fn=lambda port: f"{port} RX Rate",
+        unique_id_fn=lambda mac, port: f"port_{port}_rx_rate-{mac}",
+        value_fn=lambda rates, slot: rates.rx_rate[slot],
+        write_policy_fn=async_rate_write_policy_fn,
+        payload_keys=("port_table",),
+    ),
+    MyPortSensorEntityDescription(
+        key="Port TX Rate",
+        device_class=SensorDeviceClass.DATA_RATE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.BYTES_PER_SECOND,
+        suggested_display_precision=2,
+        suggested_unit_of_measurement=UnitOfDataRate.MEGABITS_PER_SECOND,
+        icon="mdi:download",
+        has_entity_name=True,
+        device_info_fn=async_client_device_info_fn,
+        name_fn=lambda port: f"{port} TX Rate",
+        unique_id_fn=lambda mac, port: f"port_{port}_tx_rate-{mac}",
+        value_fn=lambda rates, slot: rates.tx_rate[slot],
+        write_policy_fn=async_rate_write_policy_fn,
+        payload_keys=("port_table",),
+    ),
+)
+
+CLIENT_SENSORS: tuple[MyClientSensorEntityDescription, ...] = (
+    MyClientSensorEntityDescription(
+        key="Client RX Rate",
+        device_class=SensorDeviceClass.DATA_RATE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.BYTES_PER_SECOND,
+        suggested_display_precision=2,
+        suggested_unit_of_measurement=UnitOfDataRate.MEGABITS_PER_SECOND,
+        icon="mdi:upload",
+        has_entity_name=True,
+        device_info_fn=async_network_client_device_info_fn,
+        name_fn=lambda: "RX Rate",
+        unique_id_fn=lambda entry_id, mac: f"client_rx_rate-{entry_id}-{mac}",
+        value_fn=lambda table, slot: table.rx_rate[slot],
+    ),
+    MyClientSensorEntityDescription(
+        key="Client TX Rate",
+        device_class=SensorDeviceClass.DATA_RATE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.BYTES_PER_SECOND,
+        suggested_display_precision=2,
+        suggested_unit_of_measurement=UnitOfDataRate.MEGABITS_PER_SECOND,
+        icon="mdi:download",
+        has_entity_name=True,
+        device_info_fn=async_network_client_device_info_fn,
+        name_fn=lambda: "TX Rate",
+        unique_id_fn=lambda entry_id, mac: f"client_tx_rate-{entry_id}-{mac}",
+        value_fn=lambda table, slot: table.tx_rate[slot],
+    ),
+)
+
+STATS_SENSORS: tuple[MyStatsSensorEntityDescription, ...] = (
+    MyStatsSensorEntityDescription(
+        key="Poll duration",
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=1,
+        icon="mdi:timer-outline",
+        has_entity_name=True,
+        entity_registry_enabled_default=False,
+        device_info_fn=async_controller_device_info_fn,
+        name_fn=lambda: "Poll duration",
+        unique_id_fn=lambda entry_id: f"poll_duration-{entry_id}",
+        value_fn=lambda stats: stats.last_poll_latency * 1000,
+    ),
+    MyStatsSensorEntityDescription(
+        key="Poll size",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.KILOBYTES,
+        suggested_display_precision=1,
+        icon="mdi:download-network",
+        has_entity_name=True,
+        entity_registry_enabled_default=False,
+        device_info_fn=async_controller_device_info_fn,
+        name_fn=lambda: "Poll size",
+        unique_id_fn=lambda entry_id: f"poll_bytes-{entry_id}",
+        value_fn=lambda stats: stats.last_bytes,
+    ),
+    MyStatsSensorEntityDescription(
+        key="Parse duration",
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=2,
+        icon="mdi:code-json",
+        has_entity_name=True,
+        entity_registry_enabled_default=False,
+        device_info_fn=async_controller_device_info_fn,
+        name_fn=lambda: "Parse duration",
+        unique_id_fn=lambda entry_id: f"parse_duration-{entry_id}",
+        value_fn=lambda stats: stats.last_parse_time * 1000,
+    ),
+    MyStatsSensorEntityDescription(
+        key="Entity writes",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:pencil-outline",
+        has_entity_name=True,
+        entity_registry_enabled_default=False,
+        device_info_fn=async_controller_device_info_fn,
+        name_fn=lambda: "Entity writes per poll",
+        unique_id_fn=lambda entry_id: f"entity_writes-{entry_id}",
+        value_fn=lambda stats: stats.last_entity_writes,
+    ),
+    MyStatsSensorEntityDescription(
+        key="Relogins",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:login",
+        has_entity_name=True,
+        entity_registry_enabled_default=False,
+        device_info_fn=async_controller_device_info_fn,
+        name_fn=lambda: "Relogins",
+        unique_id_fn=lambda entry_id: f"relogins-{entry_id}",
+        value_fn=lambda stats: stats.relogins,
     ),
 )
 
@@ -196,50 +478,206 @@ async def async_setup_entry(hass, entry, async_add_entities):
     """Config entry example."""
     # assuming API object stored here by __init__.py
     unifiData = hass.data[DOMAIN][entry.entry_id]
-    data = unifiData.coordinator.data
-    udmpse_mac = next(
-        mac for mac in unifiData.coordinator.macs if data[mac]["model"] == "UDMPROSE"
+    coordinator = unifiData.coordinator
+    coordinator.async_keep_payload_keys(
+        key
+        for descriptions in (
+            GW_SENSORS,
+            PDU_SENSORS,
+            PDU_ENERGY_SENSORS,
+            OUTLET_SENSORS,
+            OUTLET_ENERGY_SENSORS,
+            PORT_SENSORS,
+        )
+        for description in descriptions
+        for key in description.payload_keys
     )
-    # lets get the gateway entities
     async_add_entities(
-        MyEntity(unifiData.coordinator, mac, description)
-        for mac in unifiData.coordinator.macs
-        for description in GW_SENSORS
-        if data[mac]["model"] in ["UDMPROSE"]
+        _device_entities(
+            coordinator, _entry_devices(entry.options, coordinator.macs), entry.options
+        )
     )
     async_add_entities(
-        MyEntity(unifiData.coordinator, mac, description)
-        for mac in unifiData.coordinator.macs
-        for description in PDU_SENSORS
-        if data[mac]["model"] in ["USPPDUP"]
+        MyStatsEntity(coordinator, unifiData.api.scope, entry.entry_id, description)
+        for description in STATS_SENSORS
     )
     async_add_entities(
-        MyOutletEntity(
-            unifiData.coordinator, mac, udmpse_mac, outlet["index"], description
+        MyClientEntity(unifiData.clients, entry.entry_id, mac, description)
+        for mac in tracked_clients(entry.options)
+        for description in CLIENT_SENSORS
+    )
+
+    @callback
+    def _async_add_devices(macs: list[str]) -> None:
+        """Add the entities of devices found by discovery."""
+        async_add_entities(
+            _device_entities(
+                coordinator, _entry_devices(entry.options, macs), entry.options
+            )
+        )
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_DEVICES_ADDED.format(entry_id=entry.entry_id),
+            _async_add_devices,
         )
-        for mac in unifiData.coordinator.macs
-        for outlet in unifiData.coordinator.data[mac]["outlet_table"]
-        for description in OUTLET_SENSORS
-        if unifiData.coordinator.data[mac]["model"] in ["USPPDUP"]
-        and not outlet["name"].startswith("Outlet")
-        and not outlet["name"].startswith("USB")
     )
 
 
-class MyEntity(CoordinatorEntity, SensorEntity):
-    """An entity using CoordinatorEntity."""
+def _entry_devices(options, macs):
+    """Return the given devices that the entry has entities for.
+
+    Entries sharing a poller each pick their devices; an entry without a
+    selection has all of them.
+    """
+    if not (selected := options.get(CONF_DEVICES)):
+        return list(macs)
+    return [mac for mac in macs if mac in selected]
+
+
+def _device_entities(coordinator, macs, options):
+    """Return the entities of the given devices."""
+    data = coordinator.data
+    udmpse_mac = next(
+        (mac for mac in coordinator.macs if data[mac].model == "UDMPROSE"), None
+    )
+    entities = []
+    for mac in macs:
+        device = data[mac]
+        # lets get the gateway entities
+        if device.model in ["UDMPROSE"]:
+            entities.extend(
+                MyEntity(coordinator, mac, description, options)
+                for description in GW_SENSORS
+            )
+        if device.model in ["USPPDUP"]:
+            entities.extend(
+                MyEntity(coordinator, mac, description, options)
+                for description in PDU_SENSORS
+            )
+            entities.extend(
+                MyEnergyEntity(coordinator, mac, description, options)
+                for description in PDU_ENERGY_SENSORS
+            )
+            entities.extend(
+                MyOutletEntity(
+                    coordinator,
+                    mac,
+                    udmpse_mac or mac,
+                    outlet.index,
+                    description,
+                    options,
+                )
+                for outlet in device.outlets
+                for description in OUTLET_SENSORS
+                if not outlet.name.startswith("Outlet")
+                and not outlet.name.startswith("USB")
+            )
+            entities.extend(
+                MyOutletEnergyEntity(
+                    coordinator,
+                    mac,
+                    udmpse_mac or mac,
+                    outlet.index,
+                    description,
+                    options,
+                )
+                for outlet in device.outlets
+                for description in OUTLET_ENERGY_SENSORS
+                if not outlet.name.startswith("Outlet")
+                and not outlet.name.startswith("USB")
+            )
+        if device.model in SWITCH_MODELS and device.ports is not None:
+            entities.extend(
+                MyPortEntity(coordinator, mac, port, name, description, options)
+                for port, name in zip(device.ports.indexes, device.ports.names)
+                for description in PORT_SENSORS
+            )
+    return entities
+
+
+class MyPolicyEntity(CoordinatorEntity, SensorEntity):
+    """A device sensor whose state writes go through a write policy.
+
+    Unavailable until its first value is written; afterwards only available
+    while the last poll succeeded and its device answered.
+    """
 
     _attr_available = False
     _attr_has_entity_name = True
+    _shown_available = False
 
-    def __init__(self, coordinator, mac, description):
+    def __init__(self, coordinator, context, mac, write_policy):
         """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator, context=mac)
-        data = coordinator.data[mac]
+        super().__init__(coordinator, context=context)
         self.mac = mac
+        self._write_policy = write_policy
+        self._last_write = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Return whether a value was written and the device still answers."""
+        return (
+            self._attr_available
+            and super().available
+            and self.coordinator.device_available(self.mac)
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Show the current value; later updates only come when it changes."""
+        await super().async_added_to_hass()
+        self._handle_coordinator_update()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop re-checking a held back value."""
+        await super().async_will_remove_from_hass()
+        self.coordinator.held_back.discard(self)
+
+    @callback
+    def async_write_value(self, val) -> None:
+        """Write a new value if the write policy lets it through.
+
+        A value held back by a deadband is re-checked after every poll, even
+        though its device did not change, until the heartbeat writes it. A
+        change of availability is always written.
+        """
+        if val is None:
+            # Not polled yet, e.g. restored from the cached topology.
+            return
+        coordinator = self.coordinator
+        now = time.monotonic()
+        available = self.available
+        if (
+            self._attr_available
+            and available == self._shown_available
+            and not self._write_policy.should_write(
+                self._attr_native_value, val, now - self._last_write
+            )
+        ):
+            if val != self._attr_native_value:
+                coordinator.held_back.add(self)
+            else:
+                coordinator.held_back.discard(self)
+            return
+        coordinator.held_back.discard(self)
+        self._attr_native_value = val
+        self._attr_available = True
+        self._shown_available = self.available
+        self._last_write = now
+        coordinator.stats.entity_writes += 1
+        self.async_write_ha_state()
+
+
+class MyEntity(MyPolicyEntity):
+    """An entity using CoordinatorEntity."""
+
+    def __init__(self, coordinator, mac, description, options):
+        """Pass coordinator to CoordinatorEntity."""
+        super().__init__(coordinator, mac, mac, description.write_policy_fn(options))
+        data = coordinator.data[mac]
         self.entity_description = description
 
-        self._attr_available = False
         self._attr_device_info = description.device_info_fn(data, mac)
         self._attr_unique_id = description.unique_id_fn(mac)
         self._attr_name = description.name_fn()
@@ -247,42 +685,39 @@ class MyEntity(CoordinatorEntity, SensorEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        if self.mac not in self.coordinator.data:
+            # Retired by discovery; the entity is being removed.
+            return
         description = self.entity_description
         val = description.value_fn(self.coordinator.data, self.mac)
-        if self._attr_available and self._attr_native_value == val:
-            return
-        self._attr_native_value = val
-        self._attr_available = True
-        self.async_write_ha_state()
+        self.async_write_value(val)
 
 
-class MyOutletEntity(CoordinatorEntity, SensorEntity):
+class MyOutletEntity(MyPolicyEntity):
     """An entity using CoordinatorEntity."""
 
-    _attr_available = False
-    _attr_has_entity_name = True
-
-    def __init__(self, coordinator, mac, udmpse_mac, outlet_index, description):
+    def __init__(
+        self, coordinator, mac, udmpse_mac, outlet_index, description, options
+    ):
         """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator, context=mac)
-        data = next(
-            outlet
-            for outlet in coordinator.data[mac]["outlet_table"]
-            if outlet["index"] == outlet_index
+        super().__init__(
+            coordinator,
+            (mac, outlet_index),
+            mac,
+            description.write_policy_fn(options),
         )
-        if re.match(OUTLET_NAME_REGEX, data["name"]):
-            self.name = data["name"].rsplit("-", 1)[0]
-            self.port = data["name"].rsplit("-", 1)[1]
+        data = coordinator.data["outlets"][(mac, outlet_index)]
+        if re.match(OUTLET_NAME_REGEX, data.name):
+            self.name = data.name.rsplit("-", 1)[0]
+            self.port = data.name.rsplit("-", 1)[1]
         else:
-            self.name = data["name"]
+            self.name = data.name
             self.port = "PSU"
 
-        self.mac = mac
         self.udmpse_mac = udmpse_mac
         self.outlet_index = outlet_index
         self.entity_description = description
 
-        self._attr_available = False
         self._attr_device_info = description.device_info_fn(self.udmpse_mac, self.name)
         self._attr_unique_id = description.unique_id_fn(mac, self.outlet_index)
         self._attr_name = description.name_fn(self.port)
@@ -291,15 +726,165 @@ class MyOutletEntity(CoordinatorEntity, SensorEntity):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         description = self.entity_description
-        data = next(
-            outlet
-            for outlet in self.coordinator.data[self.mac]["outlet_table"]
-            if outlet["index"] == self.outlet_index
-        )
+        data = self.coordinator.data["outlets"].get((self.mac, self.outlet_index))
+        if data is None:
+            # Retired by discovery; the entity is being removed.
+            return
 
         val = description.value_fn(data)
-        if self._attr_available and self._attr_native_value == val:
+        self.async_write_value(val)
+
+
+class MyEnergyMixin(RestoreSensor):
+    """Continue a meter's energy from the total restored after a restart.
+
+    The coordinator's meters start at zero with every poller, so the entity
+    adds what its meter gained since the entity was added to the total
+    restored from before the restart.
+    """
+
+    _energy_total = 0.0
+    _energy_start: float | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the total before showing the first value."""
+        self._energy_total = 0.0
+        self._energy_start = None
+        last = await self.async_get_last_sensor_data()
+        if last is not None and last.native_value is not None:
+            try:
+                self._energy_total = float(last.native_value)
+            except (TypeError, ValueError):
+                _LOGGER.debug("Not restoring energy of %s: %s", self.entity_id, last)
+        await super().async_added_to_hass()
+
+    @callback
+    def async_write_energy(self, kwh: float) -> None:
+        """Write the restored total plus the energy integrated since."""
+        if self._energy_start is None:
+            self._energy_start = kwh
+        self.async_write_value(self._energy_total + kwh - self._energy_start)
+
+
+class MyEnergyEntity(MyEnergyMixin, MyEntity):
+    """A PDU energy sensor fed by the coordinator's integrated power readings."""
+
+    def __init__(self, coordinator, mac, description, options):
+        """Listen for energy instead of power updates."""
+        super().__init__(coordinator, mac, description, options)
+        self.coordinator_context = energy_context(mac)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        data = self.coordinator.data
+        if self.coordinator_context not in data["energy"]:
+            # Not polled yet, or retired by discovery.
             return
-        self._attr_native_value = val
-        self._attr_available = True
+        self.async_write_energy(self.entity_description.value_fn(data, self.mac))
+
+
+class MyOutletEnergyEntity(MyEnergyMixin, MyOutletEntity):
+    """A PDU outlet energy sensor, restored like ``MyEnergyEntity``."""
+
+    def __init__(
+        self, coordinator, mac, udmpse_mac, outlet_index, description, options
+    ):
+        """Listen for energy instead of power updates."""
+        super().__init__(
+            coordinator, mac, udmpse_mac, outlet_index, description, options
+        )
+        self.coordinator_context = energy_context(mac, outlet_index)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        meter = self.coordinator.data["energy"].get(self.coordinator_context)
+        if meter is None:
+            # Not polled yet, or retired by discovery.
+            return
+        self.async_write_energy(self.entity_description.value_fn(meter))
+
+
+class MyPortEntity(MyPolicyEntity):
+    """A switch port sensor reading the coordinator's precomputed port rates."""
+
+    def __init__(self, coordinator, mac, port, port_name, description, options):
+        """Pass coordinator to CoordinatorEntity."""
+        super().__init__(coordinator, mac, mac, description.write_policy_fn(options))
+        self.port = port
+        self.entity_description = description
+
+        self._attr_device_info = description.device_info_fn(coordinator.data[mac], mac)
+        self._attr_unique_id = description.unique_id_fn(mac, port)
+        self._attr_name = description.name_fn(port_name)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        rates = self.coordinator.data["ports"].get(self.mac)
+        if rates is None or (slot := rates.slot(self.port)) is None:
+            return
+        val = self.entity_description.value_fn(rates, slot)
+        self.async_write_value(val)
+
+
+class MyClientEntity(CoordinatorEntity, SensorEntity):
+    """A sensor of a tracked client, reading the client table.
+
+    Only tracked clients have entities, so their values are written directly
+    whenever the client changed, without the write policies of the device
+    sensors.
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator, entry_id, mac, description):
+        """Pass coordinator to CoordinatorEntity."""
+        super().__init__(coordinator, context=mac)
+        self.mac = mac
+        self.entity_description = description
+        table = coordinator.table
+        slot = table.slot(mac)
+
+        self._attr_device_info = description.device_info_fn(
+            mac, table.names[slot] if slot is not None else None
+        )
+        self._attr_unique_id = description.unique_id_fn(entry_id, mac)
+        self._attr_name = description.name_fn()
+
+    async def async_added_to_hass(self) -> None:
+        """Show the current value; later updates only come when it changes."""
+        await super().async_added_to_hass()
+        self._handle_coordinator_update()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        table = self.coordinator.table
+        slot = table.slot(self.mac)
+        # A client that is not connected transfers nothing.
+        self._attr_native_value = (
+            self.entity_description.value_fn(table, slot) if slot is not None else 0.0
+        )
         self.async_write_ha_state()
+
+
+class MyStatsEntity(CoordinatorEntity, SensorEntity):
+    """A diagnostic sensor reading the coordinator's poll statistics."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator, controller, entry_id, description):
+        """Pass coordinator to CoordinatorEntity."""
+        super().__init__(coordinator)
+        self.entity_description = description
+
+        self._attr_device_info = description.device_info_fn(controller)
+        self._attr_unique_id = description.unique_id_fn(entry_id)
+        self._attr_name = description.name_fn()
+
+    @property
+    def native_value(self) -> float | int:
+        """Return the statistic."""
+        return self.entity_description.value_fn(self.coordinator.stats)
@@ -0,0 +1,140 @@
+"""Poll instrumentation kept by the coordinator."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import Any
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Counts of observations per upper bound, plus their count, sum and max.
+
+    Buckets are not cumulative; ``as_dict`` adds them up the way Prometheus
+    histograms are exposed. The last bucket holds everything above the
+    largest bound.
+    """
+
+    __slots__ = ("bounds", "buckets", "count", "sum", "max")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """Initialize an empty histogram."""
+        self.bounds = bounds
+        self.buckets = array("Q", bytes(8 * (len(bounds) + 1)))
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        """Return the mean observation."""
+        return self.sum / self.count if self.count else 0.0
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Return (upper bound, observations at or below it) pairs, +Inf last."""
+        total = 0
+        result = []
+        for bound, count in zip((*self.bounds, float("inf")), self.buckets):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "max": self.max,
+            "buckets": {str(bound): count for bound, count in self.cumulative()},
+        }
+
+
+class PollStats:
+    """Latency, payload and state write statistics of a coordinator.
+
+    Byte, parse, login and coalesced request counts are read from the client
+    as running totals; the coordinator stores the share of the last poll next
+    to them.
+    """
+
+    __slots__ = (
+        "poll_latency",
+        "device_latency",
+        "parse_time",
+        "polls",
+        "failures",
+        "last_poll_latency",
+        "last_bytes",
+        "last_parse_time",
+        "bytes_received",
+        "entity_writes",
+        "last_entity_writes",
+        "relogins",
+        "coalesced",
+    )
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.poll_latency = Histogram()
+        self.device_latency: dict[str, Histogram] = {}
+        self.parse_time = Histogram()
+        self.polls = 0
+        self.failures = 0
+        self.last_poll_latency = 0.0
+        self.last_bytes = 0
+        self.last_parse_time = 0.0
+        self.bytes_received = 0
+        self.entity_writes = 0
+        self.last_entity_writes = 0
+        self.relogins = 0
+        self.coalesced = 0
+
+    def observe_device(self, mac: str, latency: float) -> None:
+        """Record the latency of the request that returned a device."""
+        if (histogram := self.device_latency.get(mac)) is None:
+            histogram = self.device_latency[mac] = Histogram()
+        histogram.observe(latency)
+
+    def slowest_devices(self, count: int = 5) -> list[tuple[str, float]]:
+        """Return the MACs with the highest mean latency."""
+        return sorted(
+            ((mac, histogram.mean) for mac, histogram in self.device_latency.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:count]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for diagnostics."""
+        return {
+            "polls": self.polls,
+            "failures": self.failures,
+            "relogins": self.relogins,
+            "coalesced": self.coalesced,
+            "bytes_received": self.bytes_received,
+            "entity_writes": self.entity_writes,
+            "last_poll": {
+                "latency": self.last_poll_latency,
+                "bytes": self.last_bytes,
+                "parse_time": self.last_parse_time,
+                "entity_writes": self.last_entity_writes,
+            },
+            "poll_latency": self.poll_latency.as_dict(),
+            "parse_time": self.parse_time.as_dict(),
+            "slowest_devices": dict(self.slowest_devices()),
+            "device_latency": {
+                mac: histogram.as_dict()
+                for mac, histogram in self.device_latency.items()
+            },
+        }
@@ -0,0 +1 @@
+"""Benchmarks for the Unifi Network Poller integration."""
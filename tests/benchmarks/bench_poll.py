@@ -0,0 +1,219 @@
+"""Benchmark polling and entity updates against the fake controller.
+
+Drives ``MyCoordinator`` and the sensor platform at several device counts and
+reports poll latency, per-entity update cost, allocations and peak memory.
+The fake controller runs in the same process, so its share is included::
+
+    python -m tests.benchmarks.bench_poll
+    python -m tests.benchmarks.bench_poll --devices 10 100 --latency 0.02
+    python -m tests.benchmarks.bench_poll --devices 1 --switches 10
+    python -m tests.benchmarks.bench_poll --stdlib-json --full-payload
+    python -m tests.benchmarks.bench_poll --replay polls.jsonl.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import gc
+import json
+import logging
+from pathlib import Path
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
+
+from aiohttp import ClientSession, CookieJar
+from pytest_homeassistant_custom_component.common import async_test_home_assistant
+
+from custom_components.unifi_network_poller import sensor
+from custom_components.unifi_network_poller.api import UnifiClient
+from custom_components.unifi_network_poller.const import DOMAIN
+from custom_components.unifi_network_poller.coordinator import MyCoordinator
+from custom_components.unifi_network_poller.models import BetterUnifiData
+
+from ..fake_controller import PASSWORD, USERNAME, FakeController, make_devices
+from ..recording import load_frames
+
+DEVICE_COUNTS = (1, 10, 100, 500)
+
+
+@dataclass
+class Result:
+    """Measurements for one device count."""
+
+    devices: int
+    entities: int
+    poll_median_ms: float
+    poll_p95_ms: float
+    entity_update_us: float
+    parse_ms: float
+    alloc_blocks: int
+    peak_kib: float
+
+
+async def _setup_entities(hass: Any, coordinator: MyCoordinator) -> list[Any]:
+    """Create the sensor platform's entities without an entity registry."""
+    entry = SimpleNamespace(
+        entry_id="benchmark", options={}, async_on_unload=lambda unsub: None
+    )
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = BetterUnifiData(
+        api=coordinator.my_api, coordinator=coordinator
+    )
+    entities: list[Any] = []
+    await sensor.async_setup_entry(hass, entry, entities.extend)
+    for number, entity in enumerate(entities):
+        entity.hass = hass
+        entity.entity_id = f"sensor.benchmark_{number}"
+    return entities
+
+
+async def _bench(
+    hass: Any,
+    controller: FakeController,
+    devices: int,
+    polls: int,
+    stdlib_json: bool = False,
+    full_payload: bool = False,
+) -> Result:
+    async with ClientSession(cookie_jar=CookieJar(unsafe=True)) as session:
+        client = UnifiClient(
+            session, controller.host, USERNAME, PASSWORD, scheme="http"
+        )
+        if stdlib_json:
+            client.json_loads = json.loads
+        await client.async_login()
+        coordinator = MyCoordinator(hass, client, list(controller.devices))
+        await coordinator.async_refresh()
+        entities = await _setup_entities(hass, coordinator)
+        if full_payload:
+            coordinator.payload_keys = None
+        parse_time = coordinator.stats.parse_time.sum
+
+        latencies = []
+        update_seconds = 0.0
+        for _ in range(polls):
+            coordinator.scheduler.expire()
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for entity in entities:
+                entity._handle_coordinator_update()
+            update_seconds += time.perf_counter() - start
+        parse_time = coordinator.stats.parse_time.sum - parse_time
+
+        # Tracing slows allocation-heavy code such as decoding down unevenly,
+        # so memory is measured over separate polls.
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+        for _ in range(polls):
+            coordinator.scheduler.expire()
+            await coordinator.async_refresh()
+            for entity in entities:
+                entity._handle_coordinator_update()
+        _, peak = tracemalloc.get_traced_memory()
+        allocated = tracemalloc.take_snapshot().compare_to(baseline, "filename")
+        tracemalloc.stop()
+
+    return Result(
+        devices=devices,
+        entities=len(entities),
+        poll_median_ms=statistics.median(latencies) * 1000,
+        poll_p95_ms=statistics.quantiles(latencies, n=20)[-1] * 1000,
+        entity_update_us=update_seconds / polls / max(len(entities), 1) * 1e6,
+        parse_ms=parse_time / polls * 1000,
+        alloc_blocks=sum(stat.count_diff for stat in allocated if stat.count_diff > 0),
+        peak_kib=peak / 1024,
+    )
+
+
+async def run(
+    counts: tuple[int, ...],
+    polls: int,
+    latency: float,
+    replay: Path | None,
+    switches: int = 0,
+    stdlib_json: bool = False,
+    full_payload: bool = False,
+) -> list[Result]:
+    """Run the benchmark for every device count."""
+    # Entities are not attached to a platform; silence the resulting warnings.
+    logging.getLogger("homeassistant").setLevel(logging.ERROR)
+    results = []
+    for count in counts:
+        if replay is not None:
+            controller = FakeController(frames=load_frames(replay), latency=latency)
+        else:
+            controller = FakeController(
+                make_devices(count, switches=switches), latency=latency
+            )
+        await controller.start()
+        hass = await async_test_home_assistant(asyncio.get_running_loop())
+        try:
+            results.append(
+                await _bench(
+                    hass,
+                    controller,
+                    len(controller.devices),
+                    polls,
+                    stdlib_json,
+                    full_payload,
+                )
+            )
+        finally:
+            await hass.async_stop(force=True)
+            await controller.stop()
+        if replay is not None:
+            break
+    return results
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=DEVICE_COUNTS)
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--replay", type=Path)
+    parser.add_argument("--switches", type=int, default=0)
+    parser.add_argument(
+        "--stdlib-json", action="store_true", help="decode with json instead of orjson"
+    )
+    parser.add_argument(
+        "--full-payload", action="store_true", help="keep every payload field"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run(
+            tuple(args.devices),
+            args.polls,
+            args.latency,
+            args.replay,
+            args.switches,
+            args.stdlib_json,
+            args.full_payload,
+        )
+    )
+    print(
+        f"{'devices':>8} {'entities':>9} {'poll p50 ms':>12} {'poll p95 ms':>12} "
+        f"{'entity us':>10} {'parse ms':>9} {'alloc blocks':>13} {'peak KiB':>10}"
+    )
+    for result in results:
+        print(
+            f"{result.devices:>8} {result.entities:>9} "
+            f"{result.poll_median_ms:>12.2f} {result.poll_p95_ms:>12.2f} "
+            f"{result.entity_update_us:>10.2f} {result.parse_ms:>9.2f} "
+            f"{result.alloc_blocks:>13} "
+            f"{result.peak_kib:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
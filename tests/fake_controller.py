@@ -0,0 +1,466 @@
+"""A local stand-in for a UniFi OS controller used by tests and benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections import Counter
+import json
+import random
+import secrets
+import time
+from typing import Any
+
+from aiohttp import web
+
+USERNAME = "admin"
+PASSWORD = "password"
+SITE_PREFIX = "/proxy/network/api/s/{site}"
+SESSION_LIFETIME = 7200
+# Hourly gateway report rows: bytes per hour in each direction.
+REPORT_HOUR_MS = 3_600_000
+REPORT_RX_BYTES = 1_000_000
+REPORT_TX_BYTES = 250_000
+
+
+def _mac(kind: int, index: int) -> str:
+    """Return a deterministic, locally administered MAC address."""
+    return "02:%02x:%02x:%02x:%02x:%02x" % (
+        kind,
+        (index >> 24) & 0xFF,
+        (index >> 16) & 0xFF,
+        (index >> 8) & 0xFF,
+        index & 0xFF,
+    )
+
+
+def _token(lifetime: float = SESSION_LIFETIME) -> str:
+    """Return an unsigned JWT-shaped session token like UniFi OS issues."""
+
+    def encode(part: dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+
+    claims = {"jti": secrets.token_hex(8), "exp": int(time.time() + lifetime)}
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+def _port_table(ports: int) -> list[dict[str, Any]]:
+    """Return a port table padded like a real stat/device payload."""
+    return [
+        {
+            "port_idx": port,
+            "name": f"Port {port}",
+            "media": "GE",
+            "speed": 1000,
+            "up": True,
+            "full_duplex": True,
+            "rx_bytes": port * 1_000_000,
+            "tx_bytes": port * 2_000_000,
+            "rx_packets": port * 1_000,
+            "tx_packets": port * 2_000,
+            "rx_errors": 0,
+            "tx_errors": 0,
+            "rx_dropped": 0,
+            "tx_dropped": 0,
+            "rx_bytes-r": 0.0,
+            "tx_bytes-r": 0.0,
+            "poe_enable": False,
+            "poe_mode": "auto",
+            "stp_state": "forwarding",
+            "lldp_table": [],
+            "mac_table": [],
+        }
+        for port in range(1, ports + 1)
+    ]
+
+
+def _common(mac: str, name: str, model: str, ports: int) -> dict[str, Any]:
+    """Return the fields every device payload carries."""
+    return {
+        "_id": secrets.token_hex(12),
+        "mac": mac,
+        "name": name,
+        "model": model,
+        "type": "usw",
+        "version": "7.0.0",
+        "adopted": True,
+        "state": 1,
+        "uptime": 86400,
+        "system-stats": {"cpu": "3.1", "mem": "42.0", "uptime": "86400"},
+        "sys_stats": {"loadavg_1": "0.1", "mem_total": 2_000_000_000},
+        "config_network": {"type": "dhcp", "ip": "192.168.1.2"},
+        "port_table": _port_table(ports),
+        "ethernet_table": [{"mac": mac, "num_port": ports, "name": "eth0"}],
+        "radio_table": [],
+        "radio_table_stats": [],
+    }
+
+
+def make_gateway(index: int = 0) -> dict[str, Any]:
+    """Return a synthesized UDM Pro SE payload."""
+    mac = _mac(1, index)
+    return {
+        **_common(mac, f"Gateway {index}", "UDMPROSE", 11),
+        "type": "udm",
+        "uplink": {
+            "rx_bytes": 10_000_000_000,
+            "tx_bytes": 2_000_000_000,
+            "rx_bytes-r": 0.0,
+            "tx_bytes-r": 0.0,
+            "name": "eth8",
+            "speed": 2500,
+        },
+    }
+
+
+def make_pdu(index: int, outlets: int = 16) -> dict[str, Any]:
+    """Return a synthesized USP PDU Pro payload."""
+    mac = _mac(2, index)
+    return {
+        **_common(mac, f"PDU {index}", "USPPDUP", 1),
+        "outlet_ac_power_consumption": "120.000",
+        "outlet_table": [
+            {
+                "index": outlet,
+                "name": f"Server {index}-{outlet}-PS1",
+                "relay_state": True,
+                "cycle_enabled": False,
+                "outlet_power": "7.500",
+                "outlet_power_factor": "0.950",
+                "outlet_current": "0.060",
+                "outlet_voltage": "120.000",
+            }
+            for outlet in range(1, outlets + 1)
+        ],
+    }
+
+
+def make_switch(index: int, ports: int = 48) -> dict[str, Any]:
+    """Return a synthesized USW Pro 48 payload."""
+    mac = _mac(3, index)
+    return {
+        **_common(mac, f"Switch {index}", "US48PRO", ports),
+        "uplink": {
+            "rx_bytes": 1_000_000_000,
+            "tx_bytes": 1_000_000_000,
+            "rx_bytes-r": 0.0,
+            "tx_bytes-r": 0.0,
+            "name": "eth0",
+            "speed": 10000,
+        },
+    }
+
+
+def make_devices(
+    count: int, outlets: int = 16, switches: int = 0
+) -> list[dict[str, Any]]:
+    """Return one gateway followed by ``count - 1`` PDUs and the switches."""
+    return (
+        [make_gateway()]
+        + [make_pdu(index, outlets) for index in range(count - 1)]
+        + [make_switch(index) for index in range(switches)]
+    )
+
+
+def make_clients(count: int) -> list[dict[str, Any]]:
+    """Return synthesized stat/sta payloads of wireless clients."""
+    return [
+        {
+            "mac": _mac(9, index),
+            "hostname": f"client-{index}",
+            "ip": f"10.0.{index // 250}.{index % 250 + 2}",
+            "essid": "Home",
+            "signal": -60,
+            "rx_bytes": 1_000_000 * index,
+            "tx_bytes": 100_000 * index,
+            "uptime": 3600,
+        }
+        for index in range(count)
+    ]
+
+
+class FakeController:
+    """Serve login and stat/device endpoints over a local aiohttp server.
+
+    Counters advance on every device request, ``latency`` delays each
+    response, ``error_rate`` answers that share of requests with a 500 and
+    ``expire_sessions`` makes the next requests fail with 401 until the client
+    logs in again. Devices in ``failing`` are left out of bulk responses and
+    their own requests answer with a 500. Requests in ``errors``, e.g.
+    "POST stat/device", answer with the given status until removed. When
+    ``frames`` are given, each stat/device request replays the next recorded
+    frame instead of synthesized payloads.
+    """
+
+    def __init__(
+        self,
+        devices: list[dict[str, Any]] | None = None,
+        frames: list[dict[str, dict[str, Any]]] | None = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        clients: list[dict[str, Any]] | None = None,
+    ) -> None:
+        """Initialize the controller."""
+        self.devices = {device["mac"]: device for device in devices or ()}
+        self.clients = {client["mac"]: client for client in clients or ()}
+        self.frames = frames or []
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests: Counter[str] = Counter()
+        self.failing: set[str] = set()
+        self.errors: dict[str, int] = {}
+        self._frame = 0
+        self._rng = random.Random(seed)
+        self._tokens: set[str] = set()
+        self._runner: web.AppRunner | None = None
+        self._websockets: set[web.WebSocketResponse] = set()
+        self.host = ""
+        if self.frames and not self.devices:
+            self.devices = dict(self.frames[0])
+
+    def app(self) -> web.Application:
+        """Return the aiohttp application."""
+        app = web.Application()
+        prefix = SITE_PREFIX
+        app.router.add_post("/api/auth/login", self._login)
+        app.router.add_get(prefix + "/stat/device", self._devices)
+        app.router.add_post(prefix + "/stat/device", self._devices)
+        app.router.add_get(prefix + "/stat/device/{mac}", self._device)
+        app.router.add_get(prefix + "/stat/sysinfo", self._sysinfo)
+        app.router.add_get(prefix + "/stat/health", self._health)
+        app.router.add_get(prefix + "/stat/sta", self._stations)
+        app.router.add_post(prefix + "/stat/report/hourly.gw", self._hourly_gw)
+        app.router.add_get("/proxy/network/wss/s/{site}/events", self._events)
+        return app
+
+    async def start(self) -> str:
+        """Start serving on a free local port and return its host:port."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.host = f"127.0.0.1:{port}"
+        return self.host
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        for websocket in list(self._websockets):
+            await websocket.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def subscribers(self) -> int:
+        """Return the number of connected event stream clients."""
+        return len(self._websockets)
+
+    async def push(self, message: str, data: list[dict[str, Any]]) -> None:
+        """Send an event to every connected event stream client."""
+        for websocket in list(self._websockets):
+            await websocket.send_json(
+                {"meta": {"rc": "ok", "message": message}, "data": data}
+            )
+
+    async def push_raw(self, text: str) -> None:
+        """Send a text frame as is to every connected event stream client."""
+        for websocket in list(self._websockets):
+            await websocket.send_str(text)
+
+    async def push_device_sync(self, macs: list[str]) -> None:
+        """Advance the counters and push device:sync updates for some devices.
+
+        Like the real controller, only the changing fields are sent.
+        """
+        self.advance()
+        data = []
+        for mac in macs:
+            device = self.devices[mac]
+            update: dict[str, Any] = {"mac": mac}
+            for key in (
+                "uplink",
+                "port_table",
+                "outlet_table",
+                "outlet_ac_power_consumption",
+            ):
+                if key in device:
+                    update[key] = device[key]
+            data.append(update)
+        await self.push("device:sync", data)
+
+    def expire_sessions(self) -> None:
+        """Invalidate every issued session cookie."""
+        self._tokens.clear()
+
+    def issue_token(self, lifetime: float = SESSION_LIFETIME) -> str:
+        """Return a valid session token without going through a login."""
+        token = _token(lifetime)
+        self._tokens.add(token)
+        return token
+
+    def advance(self) -> None:
+        """Move every counter and power reading forward by one poll."""
+        for device in self.devices.values():
+            if uplink := device.get("uplink"):
+                rx_rate = self._rng.randint(1_000_000, 50_000_000)
+                tx_rate = self._rng.randint(100_000, 5_000_000)
+                uplink["rx_bytes"] += rx_rate
+                uplink["tx_bytes"] += tx_rate
+                uplink["rx_bytes-r"] = float(rx_rate)
+                uplink["tx_bytes-r"] = float(tx_rate)
+            if device["model"] == "US48PRO":
+                for port in device["port_table"]:
+                    port["rx_bytes"] += self._rng.randint(0, 10_000_000)
+                    port["tx_bytes"] += self._rng.randint(0, 10_000_000)
+            if outlets := device.get("outlet_table"):
+                total = 0.0
+                for outlet in outlets:
+                    power = max(0.0, 7.5 + self._rng.uniform(-0.5, 0.5))
+                    outlet["outlet_power"] = f"{power:.3f}"
+                    total += power
+                device["outlet_ac_power_consumption"] = f"{total:.3f}"
+
+    async def _respond(self, request: web.Request) -> web.Response | None:
+        """Apply latency, authentication and error injection."""
+        self.requests[request.path] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.cookies.get("TOKEN") not in self._tokens:
+            return web.json_response(
+                {"meta": {"rc": "error", "msg": "api.err.LoginRequired"}}, status=401
+            )
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return web.json_response(
+                {"meta": {"rc": "error", "msg": "api.err.Internal"}}, status=500
+            )
+        path = request.path.split(f"/s/{request.match_info['site']}/", 1)[1]
+        if (status := self.errors.get(f"{request.method} {path}")) is not None:
+            msg = "api.err.InvalidPayload" if status < 500 else "api.err.Internal"
+            return web.json_response(
+                {"meta": {"rc": "error", "msg": msg}}, status=status
+            )
+        return None
+
+    @staticmethod
+    def _ok(data: Any) -> web.Response:
+        return web.json_response({"meta": {"rc": "ok"}, "data": data})
+
+    def _current(self) -> dict[str, dict[str, Any]]:
+        """Return the payloads to serve for this request."""
+        if self.frames:
+            frame = self.frames[self._frame % len(self.frames)]
+            self._frame += 1
+            return frame
+        self.advance()
+        return self.devices
+
+    async def _login(self, request: web.Request) -> web.Response:
+        self.requests[request.path] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        body = await request.json()
+        if body.get("username") != USERNAME or body.get("password") != PASSWORD:
+            return web.json_response({"error": "Invalid credentials"}, status=401)
+        token = self.issue_token()
+        response = web.json_response({"username": USERNAME})
+        response.set_cookie("TOKEN", token)
+        response.headers["X-CSRF-Token"] = secrets.token_hex(16)
+        return response
+
+    async def _devices(self, request: web.Request) -> web.Response:
+        if (error := await self._respond(request)) is not None:
+            return error
+        devices = self._current()
+        if request.method == "POST":
+            macs = (await request.json()).get("macs", [])
+            return self._ok(
+                [
+                    devices[mac]
+                    for mac in macs
+                    if mac in devices and mac not in self.failing
+                ]
+            )
+        return self._ok(list(devices.values()))
+
+    async def _device(self, request: web.Request) -> web.Response:
+        if (error := await self._respond(request)) is not None:
+            return error
+        if request.match_info["mac"] in self.failing:
+            return web.json_response(
+                {"meta": {"rc": "error", "msg": "api.err.Internal"}}, status=500
+            )
+        devices = self._current()
+        if (device := devices.get(request.match_info["mac"])) is None:
+            return self._ok([])
+        return self._ok([device])
+
+    async def _hourly_gw(self, request: web.Request) -> web.Response:
+        """Answer with one row per whole hour of the requested range."""
+        if (error := await self._respond(request)) is not None:
+            return error
+        body = await request.json()
+        first = -(-body["start"] // REPORT_HOUR_MS) * REPORT_HOUR_MS
+        return self._ok(
+            [
+                {
+                    "time": time,
+                    "gw": body.get("mac"),
+                    "wan-rx_bytes": REPORT_RX_BYTES,
+                    "wan-tx_bytes": REPORT_TX_BYTES,
+                }
+                for time in range(first, body["end"], REPORT_HOUR_MS)
+            ]
+        )
+
+    async def _stations(self, request: web.Request) -> web.Response:
+        if (error := await self._respond(request)) is not None:
+            return error
+        return self._ok(list(self.clients.values()))
+
+    async def _health(self, request: web.Request) -> web.Response:
+        """Answer with a wan subsystem per gateway, carrying its uplink rates.
+
+        Counters are not advanced; the summary shows the last served state.
+        """
+        if (error := await self._respond(request)) is not None:
+            return error
+        devices = (
+            self.frames[(self._frame - 1) % len(self.frames)]
+            if self.frames
+            else self.devices
+        )
+        subsystems: list[dict[str, Any]] = [{"subsystem": "lan", "status": "ok"}]
+        for device in devices.values():
+            if device.get("type") == "udm":
+                subsystems.append(
+                    {
+                        "subsystem": "wan",
+                        "status": "ok",
+                        "gw_mac": device["mac"],
+                        "gw_name": device["name"],
+                        "rx_bytes-r": device["uplink"]["rx_bytes-r"],
+                        "tx_bytes-r": device["uplink"]["tx_bytes-r"],
+                    }
+                )
+        return self._ok(subsystems)
+
+    async def _sysinfo(self, request: web.Request) -> web.Response:
+        if (error := await self._respond(request)) is not None:
+            return error
+        return self._ok([{"hostname": "fake-udm", "version": "8.0.0"}])
+
+    async def _events(self, request: web.Request) -> web.StreamResponse:
+        self.requests[request.path] += 1
+        if request.cookies.get("TOKEN") not in self._tokens:
+            return web.json_response({"error": "Unauthorized"}, status=401)
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self._websockets.add(websocket)
+        try:
+            async for _ in websocket:
+                pass
+        finally:
+            self._websockets.discard(websocket)
+        return websocket
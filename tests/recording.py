@@ -0,0 +1,121 @@
+"""Record controller poll payloads to compressed JSONL and load them for replay.
+
+Run against a real controller to capture fixtures for the fake controller::
+
+    UNIFI_PASSWORD=... python -m tests.recording 192.168.1.1 admin polls.jsonl.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+from pathlib import Path
+import time
+from typing import Any
+
+from aiohttp import ClientSession, CookieJar, TCPConnector
+
+from custom_components.unifi_network_poller.api import UnifiClient
+
+
+class RecordingClient(UnifiClient):
+    """A client that appends every API response to a gzip JSONL file."""
+
+    def __init__(self, *args: Any, path: Path, **kwargs: Any) -> None:
+        """Initialize the client and open the recording."""
+        super().__init__(*args, **kwargs)
+        self._file = gzip.open(path, "at", encoding="utf-8")
+
+    async def async_request(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        params: dict[str, Any] | None = None,
+    ) -> Any:
+        """Forward the request and record its response."""
+        data = await super().async_request(method, path, json=json, params=params)
+        self._file.write(
+            _dumps(
+                {
+                    "time": time.time(),
+                    "method": method,
+                    "path": path,
+                    "body": json,
+                    "data": data,
+                }
+            )
+            + "\n"
+        )
+        return data
+
+    def close(self) -> None:
+        """Flush and close the recording."""
+        self._file.close()
+
+
+def _dumps(record: dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":"))
+
+
+def load_frames(path: Path) -> list[dict[str, dict[str, Any]]]:
+    """Return the recorded stat/device responses, one frame per poll.
+
+    Each frame maps MAC addresses to device payloads and can be passed to
+    ``FakeController(frames=...)``.
+    """
+    frames = []
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            if record["path"] != "stat/device":
+                continue
+            frames.append({device["mac"]: device for device in record["data"]})
+    return frames
+
+
+async def record(
+    host: str, username: str, password: str, path: Path, polls: int, interval: float
+) -> None:
+    """Poll a controller the way the coordinator does and record the responses."""
+    async with ClientSession(
+        cookie_jar=CookieJar(unsafe=True), connector=TCPConnector(ssl=False)
+    ) as session:
+        client = RecordingClient(session, host, username, password, path=path)
+        try:
+            await client.async_login()
+            devices = await client.async_get_devices()
+            macs = [device["mac"] for device in devices]
+            for _ in range(polls):
+                await asyncio.sleep(interval)
+                await client.async_get_devices(macs)
+        finally:
+            client.close()
+
+
+def main() -> None:
+    """Record polls from the controller given on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("host")
+    parser.add_argument("username")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--polls", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(
+        record(
+            args.host,
+            args.username,
+            os.environ["UNIFI_PASSWORD"],
+            args.output,
+            args.polls,
+            args.interval,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Test filling gaps in the counters' statistics from the hourly reports."""
+
+from datetime import timedelta
+
+from aiohttp import ClientSession, CookieJar
+from homeassistant.const import UnitOfInformation
+from homeassistant.helpers import entity_registry as er
+import pytest
+
+pytest.importorskip("homeassistant.components.recorder")
+
+from homeassistant.components.recorder.statistics import (  # noqa: E402
+    async_import_statistics,
+    statistics_during_period,
+)
+from homeassistant.util import dt as dt_util  # noqa: E402
+from pytest_homeassistant_custom_component.components.recorder.common import (  # noqa: E402
+    async_wait_recording_done,
+)
+
+from custom_components.unifi_network_poller.api import UnifiClient  # noqa: E402
+from custom_components.unifi_network_poller.backfill import (  # noqa: E402
+    async_backfill_statistics,
+)
+from custom_components.unifi_network_poller.const import (  # noqa: E402
+    BACKFILL_DAYS,
+    DOMAIN,
+)
+from custom_components.unifi_network_poller.models import (  # noqa: E402
+    DeviceSnapshot,
+)
+
+from .fake_controller import (  # noqa: E402
+    PASSWORD,
+    REPORT_RX_BYTES,
+    USERNAME,
+    FakeController,
+    make_gateway,
+)
+
+
+async def test_backfill_fills_gaps_once(recorder_mock, hass, socket_enabled):
+    """Test missing hours are filled around the recorded sums, and only once."""
+    controller = FakeController([make_gateway()])
+    await controller.start()
+    gateway = DeviceSnapshot.from_payload(next(iter(controller.devices.values())), 0)
+    rx = (
+        er.async_get(hass)
+        .async_get_or_create("sensor", DOMAIN, f"rx-{gateway.mac}")
+        .entity_id
+    )
+    end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    first, last = end - timedelta(hours=10), end - timedelta(hours=2)
+    # Recorded before and after an outage; the counter moved on meanwhile.
+    async_import_statistics(
+        hass,
+        {
+            "has_mean": False,
+            "has_sum": True,
+            "name": None,
+            "source": "recorder",
+            "statistic_id": rx,
+            "unit_of_measurement": UnitOfInformation.BYTES,
+        },
+        [{"start": first, "sum": 0.0}, {"start": last, "sum": 8 * REPORT_RX_BYTES + 5}],
+    )
+    await async_wait_recording_done(hass)
+
+    async with ClientSession(cookie_jar=CookieJar(unsafe=True)) as session:
+        client = UnifiClient(
+            session, controller.host, USERNAME, PASSWORD, scheme="http"
+        )
+        await client.async_login()
+        await async_backfill_statistics(hass, client, [gateway])
+        await async_wait_recording_done(hass)
+        pages = controller.requests[
+            "/proxy/network/api/s/default/stat/report/hourly.gw"
+        ]
+        await async_backfill_statistics(hass, client, [gateway])
+        await async_wait_recording_done(hass)
+    await controller.stop()
+
+    # Nothing left to fill on the second run.
+    assert (
+        controller.requests["/proxy/network/api/s/default/stat/report/hourly.gw"]
+        == pages
+    )
+    stats = await hass.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        end - timedelta(days=BACKFILL_DAYS + 1),
+        end,
+        {rx},
+        "hour",
+        None,
+        {"sum"},
+    )
+    sums = [row["sum"] for row in stats[rx]]
+    assert len(sums) == BACKFILL_DAYS * 24 - 1
+    assert sums[0] == -(BACKFILL_DAYS * 24 - 10) * REPORT_RX_BYTES
+    # The recorded sums are kept; the gap takes the reported hours.
+    assert sums[-9:] == [0.0] + [hour * REPORT_RX_BYTES + 5 for hour in range(1, 9)]
@@ -0,0 +1,121 @@
+"""Test client tracking."""
+
+from datetime import timedelta
+from functools import partial
+from unittest.mock import patch
+
+from homeassistant import loader
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    STATE_HOME,
+    STATE_NOT_HOME,
+)
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.unifi_network_poller.api import UnifiClient
+from custom_components.unifi_network_poller.clients import ClientTable
+from custom_components.unifi_network_poller.const import (
+    CLIENT_POLL_INTERVAL,
+    CONF_TRACKED_CLIENTS,
+    DOMAIN,
+)
+
+from .fake_controller import (
+    PASSWORD,
+    USERNAME,
+    FakeController,
+    make_clients,
+    make_devices,
+)
+
+
+def test_table_diff():
+    """Test a listing is applied as joined, left and changed clients."""
+    table = ClientTable()
+    first, second, third = make_clients(3)
+    diff = table.apply([first, second], 0.0)
+    assert diff.joined == [first["mac"], second["mac"]]
+
+    assert not table.apply([first, second], 10.0)
+
+    moved = {**second, "rx_bytes": second["rx_bytes"] + 5000}
+    diff = table.apply([moved, third], 20.0)
+    assert diff.joined == [third["mac"]]
+    assert diff.left == [first["mac"]]
+    assert diff.changed == [second["mac"]]
+    assert table.rx_rate[table.slot(second["mac"])] == 500.0
+    assert first["mac"] not in table
+
+    # Idle again: the rate drops back to zero.
+    diff = table.apply([moved, third], 30.0)
+    assert diff.changed == [second["mac"]]
+    assert table.rx_rate[table.slot(second["mac"])] == 0.0
+
+
+def test_table_reuses_slots():
+    """Test the arrays only grow with the most clients connected at once."""
+    table = ClientTable()
+    clients = make_clients(200)
+    for start in range(0, 200, 50):
+        table.apply(clients[start : start + 100], float(start))
+
+    assert len(table) == 50
+    assert len(table.rx_bytes) == 100
+
+
+@pytest.fixture
+async def controller(socket_enabled):
+    """Run a fake controller with many clients."""
+    controller = FakeController(make_devices(1), clients=make_clients(500))
+    await controller.start()
+    with patch(
+        "custom_components.unifi_network_poller.poller.UnifiClient",
+        partial(UnifiClient, scheme="http"),
+    ):
+        yield controller
+    await controller.stop()
+
+
+async def test_only_tracked_clients_get_entities(hass, controller):
+    """Test entities are created for tracked clients and follow their presence."""
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+    tracked = list(controller.clients)[7]
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_HOST: controller.host,
+            CONF_USERNAME: USERNAME,
+            CONF_PASSWORD: PASSWORD,
+        },
+        options={CONF_TRACKED_CLIENTS: [tracked.upper()]},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    client_entities = [
+        entity.entity_id
+        for entity in er.async_entries_for_config_entry(entity_registry, entry.entry_id)
+        if entity.unique_id.endswith(tracked)
+    ]
+    assert len(client_entities) == 3
+    assert hass.states.get("device_tracker.client_7").state == STATE_HOME
+
+    del controller.clients[tracked]
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=CLIENT_POLL_INTERVAL + 1)
+    )
+    await hass.async_block_till_done()
+
+    assert hass.states.get("device_tracker.client_7").state == STATE_NOT_HOME
+    assert hass.states.get("sensor.client_7_rx_rate").state == "0.0"
+    assert await hass.config_entries.async_unload(entry.entry_id)
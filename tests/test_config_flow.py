@@ -0,0 +1,62 @@
+"""Test the config flow."""
+
+from unittest.mock import patch
+
+from homeassistant import config_entries, loader
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.unifi_network_poller.const import CONF_SITE, DOMAIN
+
+USER_INPUT = {
+    CONF_HOST: "unifi.local",
+    CONF_USERNAME: "user",
+    CONF_PASSWORD: "secret",
+}
+
+
+async def test_same_site_aborts(hass):
+    """Test a second entry for the same host, user and site is refused."""
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+    MockConfigEntry(
+        domain=DOMAIN, version=2, data={**USER_INPUT, CONF_SITE: "default"}
+    ).add_to_hass(hass)
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(
+        "custom_components.unifi_network_poller.config_flow.validate_input"
+    ) as validate:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], USER_INPUT
+        )
+
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
+    validate.assert_not_called()
+
+
+async def test_other_site_creates_entry(hass):
+    """Test another site of a configured host gets its own entry."""
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+    MockConfigEntry(
+        domain=DOMAIN, version=2, data={**USER_INPUT, CONF_SITE: "default"}
+    ).add_to_hass(hass)
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(
+        "custom_components.unifi_network_poller.config_flow.validate_input",
+        return_value={"title": "UDM (lab)"},
+    ), patch(
+        "custom_components.unifi_network_poller.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {**USER_INPUT, CONF_SITE: "lab"}
+        )
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert result["data"][CONF_SITE] == "lab"
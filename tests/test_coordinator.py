@@ -0,0 +1,434 @@
+"""Test the coordinator against the fake controller."""
+
+import asyncio
+import copy
+from unittest.mock import patch
+
+from aiohttp import ClientSession, CookieJar
+import pytest
+
+from custom_components.unifi_network_poller.api import UnifiClient, UnifiConnectionError
+from custom_components.unifi_network_poller.coordinator import MyCoordinator
+from custom_components.unifi_network_poller.models import DeviceSnapshot
+from custom_components.unifi_network_poller.sensor import async_rx_rate_val_fn
+
+from .fake_controller import (
+    PASSWORD,
+    USERNAME,
+    FakeController,
+    make_devices,
+    make_pdu,
+    make_switch,
+)
+
+
+@pytest.fixture
+async def controller(socket_enabled):
+    """Run a fake controller with a gateway and two PDUs."""
+    controller = FakeController(make_devices(3, outlets=4))
+    await controller.start()
+    yield controller
+    await controller.stop()
+
+
+@pytest.fixture
+async def client(controller):
+    """Return a logged in client for the fake controller."""
+    async with ClientSession(cookie_jar=CookieJar(unsafe=True)) as session:
+        client = UnifiClient(
+            session, controller.host, USERNAME, PASSWORD, scheme="http"
+        )
+        await client.async_login()
+        yield client
+
+
+async def test_bulk_poll(hass, controller, client):
+    """Test every device is fetched with a single request."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert controller.requests["/proxy/network/api/s/default/stat/device"] == 1
+    gateway, pdu, _ = controller.devices
+    assert coordinator.data[gateway].rx_bytes is not None
+    assert len(coordinator.data[pdu].outlets) == 4
+    assert coordinator.data["outlets"][(pdu, 2)].name.endswith("-2-PS1")
+
+
+async def test_bulk_fallback_only_when_refused(hass, controller, client):
+    """Test a failing bulk request is retried next poll unless it was refused."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    coordinator.health_fetch = False
+    controller.errors["POST stat/device"] = 500
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.bulk_fetch
+
+    controller.errors["POST stat/device"] = 400
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert not coordinator.bulk_fetch
+    gateway = next(iter(controller.devices))
+    assert controller.requests[f"/proxy/network/api/s/default/stat/device/{gateway}"]
+
+
+@pytest.mark.parametrize(
+    "error", [UnifiConnectionError("connection reset"), asyncio.TimeoutError()]
+)
+async def test_bulk_connection_failure_falls_back(hass, controller, client, error):
+    """Test a bulk request that times out or drops falls back per device."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    coordinator.health_fetch = False
+    await coordinator.async_refresh()
+    gateway, pdu, _ = controller.devices
+    controller.failing.add(pdu)
+    coordinator.scheduler.expire()
+    with patch.object(coordinator, "_async_fetch_bulk", side_effect=error):
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.bulk_fetch
+    assert coordinator.device_available(gateway)
+    assert pdu in coordinator.device_failures
+
+
+async def test_payload_pruned_to_read_fields(hass, controller, client):
+    """Test payloads keep only the fields the snapshots and entities read."""
+    devices = await client.async_get_devices(keys=frozenset({"mac", "model"}))
+    assert all(set(device) == {"mac", "model"} for device in devices)
+
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    coordinator.async_keep_payload_keys(["outlet_table"])
+    assert "uplink" in coordinator.payload_keys
+    assert "port_table" not in coordinator.payload_keys
+    await coordinator.async_refresh()
+
+    gateway, pdu, _ = controller.devices
+    assert coordinator.data[gateway].name == controller.devices[gateway]["name"]
+    assert coordinator.data[gateway].rx_bytes is not None
+    assert coordinator.data[pdu].ac_power is not None
+    assert len(coordinator.data[pdu].outlets) == 4
+    assert coordinator.stats.last_parse_time > 0
+
+
+async def test_poll_stats(hass, controller, client):
+    """Test each poll records its latency, size and the devices it fetched."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    await coordinator.async_refresh()
+    controller.expire_sessions()
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+
+    stats = coordinator.stats
+    assert stats.polls == 2
+    assert stats.poll_latency.count == 2
+    assert stats.last_bytes > 0
+    assert stats.bytes_received > stats.last_bytes
+    assert stats.relogins == 1
+    assert set(stats.device_latency) == set(controller.devices)
+
+
+async def test_failing_device_keeps_last_good_data(hass, controller, client):
+    """Test a failing device backs off and goes unavailable on its own."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    coordinator.health_fetch = False
+    await coordinator.async_refresh()
+    gateway, pdu, _ = controller.devices
+    last_good = coordinator.data[pdu]
+    rx_bytes = coordinator.data[gateway].rx_bytes
+    controller.failing.add(pdu)
+
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data[gateway].rx_bytes > rx_bytes
+    assert coordinator.data[pdu] is last_good
+    assert last_good.stale
+    assert coordinator.device_available(pdu)
+
+    # Backing off: the next poll does not ask for the device.
+    requests = controller.requests[f"/proxy/network/api/s/default/stat/device/{pdu}"]
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+    assert (
+        controller.requests[f"/proxy/network/api/s/default/stat/device/{pdu}"]
+        == requests
+    )
+
+    for _ in range(2):
+        coordinator.device_failures[pdu].retry_at = 0.0
+        coordinator.scheduler.expire()
+        await coordinator.async_refresh()
+    assert coordinator.device_failures[pdu].count == 3
+    assert not coordinator.device_available(pdu)
+    assert coordinator.device_available(gateway)
+
+    controller.failing.clear()
+    coordinator.device_failures[pdu].retry_at = 0.0
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+    assert coordinator.device_available(pdu)
+    assert not coordinator.data[pdu].stale
+
+
+async def test_gateway_fetched_in_full_by_default(hass, controller, client):
+    """Test gateway counters and rates move on every poll by default."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    await coordinator.async_refresh()
+    gateway = next(iter(controller.devices))
+    rx_bytes = coordinator.data[gateway].rx_bytes
+    controller.advance()
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+
+    uplink = controller.devices[gateway]["uplink"]
+    assert "/proxy/network/api/s/default/stat/health" not in controller.requests
+    assert coordinator.data[gateway].rx_bytes == uplink["rx_bytes"] != rx_bytes
+    assert async_rx_rate_val_fn(coordinator.data, gateway) == uplink["rx_bytes-r"]
+
+
+async def test_gateway_rates_from_health(hass, controller, client):
+    """Test gateway rates come from stat/health between full fetches."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    coordinator.full_fetch_interval = 300
+    await coordinator.async_refresh()
+    gateway, pdu, _ = controller.devices
+    rx_bytes = coordinator.data[gateway].rx_bytes
+    controller.advance()
+    uplink = controller.devices[gateway]["uplink"]
+    rx_rate = uplink["rx_bytes-r"]
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+
+    assert controller.requests["/proxy/network/api/s/default/stat/health"] == 1
+    assert coordinator.data[gateway].rx_bytes == rx_bytes
+    assert coordinator.data[gateway].rx_rate == rx_rate
+    assert async_rx_rate_val_fn(coordinator.data, gateway) == rx_rate
+    assert coordinator.data[pdu].ac_power is not None
+
+    controller.errors["GET stat/health"] = 500
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+    assert coordinator.health_fetch
+    controller.errors.clear()
+
+    coordinator._full_fetched[gateway] -= coordinator.full_fetch_interval
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+    assert controller.requests["/proxy/network/api/s/default/stat/health"] == 2
+    assert coordinator.data[gateway].rx_bytes == uplink["rx_bytes"] != rx_bytes
+    assert async_rx_rate_val_fn(coordinator.data, gateway) == uplink["rx_bytes-r"]
+
+
+async def test_expired_session(hass, controller, client):
+    """Test an expired session is renewed within the same poll."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    controller.expire_sessions()
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert controller.requests["/api/auth/login"] == 2
+
+
+async def test_concurrent_requests_share_login(controller, client):
+    """Test requests refused at the same time trigger a single login."""
+    controller.expire_sessions()
+    macs = list(controller.devices)
+    await asyncio.gather(*(client.async_get_device(mac) for mac in macs))
+
+    assert controller.requests["/api/auth/login"] == 2
+
+
+async def test_identical_requests_share_one_response(controller, client):
+    """Test concurrent identical stat requests reach the controller once."""
+    gateway = next(iter(controller.devices))
+    controller.latency = 0.05
+    results = await asyncio.gather(
+        *(client.async_get_device(gateway) for _ in range(3)),
+        client.async_get_sysinfo(),
+    )
+
+    path = f"/proxy/network/api/s/default/stat/device/{gateway}"
+    assert controller.requests[path] == 1
+    assert client.coalesced == 2
+    assert results[0] == results[1] == results[2]
+
+    await client.async_get_device(gateway)
+    assert controller.requests[path] == 2
+
+
+async def test_abandoned_request_is_cancelled(controller, client):
+    """Test a request is only cancelled once every caller gave up on it."""
+    gateway = next(iter(controller.devices))
+    controller.latency = 0.2
+    waiting = asyncio.ensure_future(client.async_get_device(gateway))
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.async_get_device(gateway), 0.05)
+    assert (await waiting)["mac"] == gateway
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.async_get_device(gateway), 0.05)
+    assert not client._inflight
+    assert (await client.async_get_device(gateway))["mac"] == gateway
+
+
+async def test_restore_session(controller, client):
+    """Test a persisted session is reused and one near expiry is not."""
+    session = client.session
+    fresh = UnifiClient(session, controller.host, USERNAME, PASSWORD, scheme="http")
+    session.cookie_jar.clear()
+
+    assert not fresh.restore_session({"token": controller.issue_token(60)})
+    assert fresh.restore_session({"token": controller.issue_token()})
+    await fresh.async_get_sysinfo()
+    assert controller.requests["/api/auth/login"] == 1
+
+
+async def test_push_updates_affected_devices(hass, controller, client):
+    """Test a device:sync message only notifies that device's listeners."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    await coordinator.async_refresh()
+    _, pdu, other = controller.devices
+    updates = []
+    unsubs = [
+        coordinator.async_add_listener(lambda: updates.append(pdu), pdu),
+        coordinator.async_add_listener(lambda: updates.append(other), other),
+    ]
+
+    task = hass.async_create_background_task(coordinator.async_push_loop(), "push")
+    while not controller.subscribers:
+        await asyncio.sleep(0.01)
+    await controller.push_device_sync([pdu])
+    while not updates:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    for unsub in unsubs:
+        unsub()
+
+    assert updates == [pdu]
+    assert coordinator.push_connected
+    assert coordinator.data[pdu].ac_power == float(
+        controller.devices[pdu]["outlet_ac_power_consumption"]
+    )
+
+
+async def test_push_survives_bad_messages(hass, controller, client):
+    """Test invalid and partial messages neither end nor wedge the push loop."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    await coordinator.async_refresh()
+    gateway, pdu, _ = controller.devices
+    tx_bytes = coordinator.data[gateway].tx_bytes
+    updates = []
+    unsub = coordinator.async_add_listener(lambda: updates.append(pdu), pdu)
+
+    task = hass.async_create_background_task(coordinator.async_push_loop(), "push")
+    while not controller.subscribers:
+        await asyncio.sleep(0.01)
+    with patch.object(
+        coordinator, "_async_handle_event", side_effect=[KeyError("boom"), None]
+    ) as handle:
+        await controller.push("device:sync", [])
+        await controller.push("device:sync", [])
+        while handle.call_count < 2:
+            await asyncio.sleep(0.01)
+    await controller.push_raw("not json")
+    await controller.push(
+        "device:sync", [{"mac": gateway, "uplink": {"rx_bytes": 1}}, {"mac": pdu}]
+    )
+    await controller.push_device_sync([pdu])
+    while not updates:
+        await asyncio.sleep(0.01)
+
+    assert coordinator.data[gateway].rx_bytes == 1
+    assert coordinator.data[gateway].tx_bytes == tx_bytes
+    assert coordinator.push_connected
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    unsub()
+    assert not coordinator.push_connected
+
+
+async def test_discovery_adds_and_retires(hass, controller, client):
+    """Test discovery follows devices added to and removed from the controller."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    await coordinator.async_refresh()
+    gateway, pdu, removed = controller.devices
+    del controller.devices[removed]
+    new = make_pdu(7)
+    controller.devices[new["mac"]] = new
+
+    added, retired = await coordinator.async_discover()
+
+    assert added == [new["mac"]]
+    assert retired == [removed]
+    assert coordinator.macs == [gateway, pdu, new["mac"]]
+    assert removed not in coordinator.data
+    assert len(coordinator.data[new["mac"]].outlets) == 16
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert await coordinator.async_discover() == ([], [])
+
+
+async def test_seed_from_topology(hass, controller, client):
+    """Test cached topology stands in for data until the first poll."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    await coordinator.async_refresh()
+    cached = MyCoordinator(hass, client, list(coordinator.macs))
+    cached.async_seed(
+        [DeviceSnapshot.from_payload(device, 0.0) for device in coordinator.topology]
+    )
+
+    _, pdu, _ = controller.devices
+    assert cached.data[pdu].model == "USPPDUP"
+    assert cached.data[pdu].ac_power is None
+    assert (pdu, 1) in cached.data["outlets"]
+    await cached.async_refresh()
+    assert cached.data[pdu].ac_power is not None
+
+
+async def test_switch_port_rates(hass, controller, client):
+    """Test switch port counters become per-port rates."""
+    switch = make_switch(0, ports=8)
+    controller.devices[switch["mac"]] = switch
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    await coordinator.async_refresh()
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+
+    assert set(coordinator.port_rates) == {switch["mac"]}
+    rates = coordinator.data["ports"][switch["mac"]]
+    assert rates.ports == tuple(range(1, 9))
+    assert len(rates.rx_rate) == 8
+    assert any(rate > 0 for rate in rates.rx_rate)
+    assert rates.rx_bytes[rates.slot(3)] == switch["port_table"][2]["rx_bytes"]
+
+
+async def test_only_changed_contexts_are_notified(hass, socket_enabled, client):
+    """Test a poll only updates listeners of devices and outlets that changed."""
+    frame = {device["mac"]: device for device in make_devices(2, outlets=2)}
+    changed = copy.deepcopy(frame)
+    gateway, pdu = frame
+    changed[pdu]["outlet_table"][1]["outlet_power"] = "9.000"
+    controller = FakeController(frames=[frame, frame, changed])
+    await controller.start()
+    client.host = controller.host
+    await client.async_login()
+
+    coordinator = MyCoordinator(hass, client, list(frame))
+    await coordinator.async_refresh()
+    updates = []
+    unsubs = [
+        coordinator.async_add_listener(lambda c=context: updates.append(c), context)
+        for context in (None, gateway, pdu, (pdu, 1), (pdu, 2))
+    ]
+    for _ in range(2):
+        coordinator.scheduler.expire()
+        await coordinator.async_refresh()
+    for unsub in unsubs:
+        unsub()
+    await controller.stop()
+
+    assert updates == [None, None, (pdu, 2)]
@@ -0,0 +1,42 @@
+"""Test the per-port rates and energy meters."""
+from array import array
+
+import pytest
+
+from custom_components.unifi_network_poller.history import EnergyMeter, PortRates
+
+
+def test_port_rates():
+    """Test every port's rate is computed from its counters, resets included."""
+    rates = PortRates((1, 2, 5))
+    rates.update(0.0, array("q", [100, 200, 300]), array("q", [0, 0, 0]))
+    assert list(rates.rx_rate) == [0.0, 0.0, 0.0]
+
+    rates.update(10.0, array("q", [200, 200, 30]), array("q", [50, 0, 0]))
+    assert list(rates.rx_rate) == [10.0, 0.0, 3.0]
+    assert list(rates.tx_rate) == [5.0, 0.0, 0.0]
+    assert rates.slot(5) == 2
+    assert rates.slot(3) is None
+
+    rates.update(10.0, array("q", [900, 900, 900]), array("q", [0, 0, 0]))
+    assert list(rates.rx_rate) == [10.0, 0.0, 3.0]
+
+
+def test_energy_trapezoid():
+    """Test energy is the area under the straight lines between samples."""
+    meter = EnergyMeter(max_gap=3600.0)
+    assert not meter.add(0.0, 100.0)
+    assert meter.add(1800.0, 300.0)
+    assert meter.kwh == pytest.approx(0.1)
+    assert not meter.add(1800.0, 500.0)
+    assert meter.add(2700.0, 500.0)
+    assert meter.kwh == pytest.approx(0.225)
+
+
+def test_energy_skips_gaps():
+    """Test samples further apart than the maximum gap add nothing."""
+    meter = EnergyMeter(max_gap=60.0)
+    meter.add(0.0, 1000.0)
+    assert not meter.add(600.0, 1000.0)
+    assert meter.add(636.0, 1000.0)
+    assert meter.kwh == pytest.approx(0.01)
@@ -4,6 +4,6 @@ from homeassistant.setup import async_setup_component
 from custom_components.unifi_network_poller.const import DOMAIN
 
 
-async def test_async_setup(hass):
+async def test_async_setup(hass, enable_custom_integrations):
     """Test the component gets setup."""
     assert await async_setup_component(hass, DOMAIN, {}) is True
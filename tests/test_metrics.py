@@ -0,0 +1,105 @@
+"""Test the OpenMetrics exposition."""
+
+from functools import partial
+from unittest.mock import patch
+
+from aiohttp import ClientSession, CookieJar
+from homeassistant import loader
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.setup import async_setup_component
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.unifi_network_poller.api import UnifiClient
+from custom_components.unifi_network_poller.const import DOMAIN
+from custom_components.unifi_network_poller.coordinator import MyCoordinator
+from custom_components.unifi_network_poller.metrics import (
+    CONTENT_TYPE,
+    MetricsExporter,
+    MetricsView,
+    render,
+)
+
+from .fake_controller import PASSWORD, USERNAME, FakeController, make_devices
+
+
+@pytest.fixture
+async def controller(socket_enabled):
+    """Run a fake controller with a gateway and a PDU."""
+    controller = FakeController(make_devices(2, outlets=2))
+    await controller.start()
+    yield controller
+    await controller.stop()
+
+
+@pytest.fixture
+async def client(controller):
+    """Return a logged in client for the fake controller."""
+    async with ClientSession(cookie_jar=CookieJar(unsafe=True)) as session:
+        client = UnifiClient(
+            session, controller.host, USERNAME, PASSWORD, scheme="http"
+        )
+        await client.async_login()
+        yield client
+
+
+async def test_exporter_formats_only_changes(hass, controller, client):
+    """Test the blocks are reused until a poll changes what they show."""
+    coordinator = MyCoordinator(hass, client, list(controller.devices))
+    exporter = MetricsExporter(coordinator, "controller")
+    await coordinator.async_refresh()
+
+    blocks = exporter.blocks()
+    assert exporter.blocks() is blocks
+    text = render([blocks]).decode()
+    gateway, pdu = controller.devices
+    rx_bytes = coordinator.data[gateway].rx_bytes
+    assert (
+        f'unifi_uplink_receive_bytes_total{{controller="controller",mac="{gateway}",'
+        in text
+    )
+    assert f'model="UDMPROSE"}} {rx_bytes}\n' in text
+    assert text.count("unifi_outlet_power_watts{") == 2
+    assert 'unifi_polls_total{controller="controller"} 1\n' in text
+    assert (
+        'unifi_poll_duration_seconds_bucket{controller="controller",le="+Inf"} 1\n'
+        in text
+    )
+    assert text.index("# TYPE unifi_device_up") < text.index("unifi_device_up{")
+    assert text.endswith("# EOF\n")
+
+    coordinator.scheduler.expire()
+    await coordinator.async_refresh()
+    assert exporter.blocks() is not blocks
+    rx_bytes = coordinator.data[gateway].rx_bytes
+    assert f'model="UDMPROSE"}} {rx_bytes}\n' in render([exporter.blocks()]).decode()
+
+
+async def test_metrics_view(hass, hass_client, controller):
+    """Test the view serves the polled data of the set up controller."""
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+    assert await async_setup_component(hass, "http", {})
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_HOST: controller.host,
+            CONF_USERNAME: USERNAME,
+            CONF_PASSWORD: PASSWORD,
+        },
+    )
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.unifi_network_poller.poller.UnifiClient",
+        partial(UnifiClient, scheme="http"),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    http = await hass_client()
+    response = await http.get(MetricsView.url)
+    assert response.status == 200
+    assert response.headers["Content-Type"] == CONTENT_TYPE
+    text = await response.text()
+    assert f'controller="{controller.host}"' in text
+    assert "unifi_pdu_power_watts{" in text
+    assert text.endswith("# EOF\n")
@@ -0,0 +1,126 @@
+"""Test the projection of controller payloads into snapshots."""
+from custom_components.unifi_network_poller.models import DeviceSnapshot, WritePolicy
+
+
+def test_gateway_projection():
+    """Test only the uplink counters of a gateway are kept."""
+    snapshot = DeviceSnapshot.from_payload(
+        {
+            "mac": "aa:bb:cc:dd:ee:ff",
+            "name": "Gateway",
+            "model": "UDMPROSE",
+            "uplink": {"rx_bytes": 10, "tx_bytes": 20, "rx_bytes-r": 1.5},
+            "port_table": [{"port_idx": 1}],
+        },
+        received=5.0,
+    )
+
+    assert snapshot.rx_bytes == 10
+    assert snapshot.tx_bytes == 20
+    assert snapshot.rx_rate == 1.5
+    assert snapshot.tx_rate == 0.0
+    assert snapshot.ac_power is None
+    assert snapshot.outlets == ()
+    assert snapshot.ports is None
+    assert not hasattr(snapshot, "__dict__")
+
+
+def test_health_updates_rates_only():
+    """Test the health summary moves the uplink rates but not the counters."""
+    snapshot = DeviceSnapshot.from_payload(
+        {
+            "mac": "aa:bb:cc:dd:ee:ff",
+            "model": "UDMPROSE",
+            "uplink": {"rx_bytes": 10, "tx_bytes": 20, "rx_bytes-r": 1.5},
+        },
+        received=5.0,
+    )
+    snapshot.apply_health({"subsystem": "wan", "rx_bytes-r": 8.0}, received=6.0)
+
+    assert snapshot.rx_bytes == 10
+    assert snapshot.rx_rate == 8.0
+    assert snapshot.tx_rate == 0.0
+    assert snapshot.received == 6.0
+
+
+def test_pdu_projection():
+    """Test PDU power strings are parsed into floats."""
+    snapshot = DeviceSnapshot.from_payload(
+        {
+            "mac": "11:22:33:44:55:66",
+            "name": "PDU",
+            "model": "USPPDUP",
+            "outlet_ac_power_consumption": "38.5",
+            "outlet_table": [
+                {"index": 1, "name": "NAS-PS1", "outlet_power": "12.25"},
+                {"index": 2, "name": "Outlet 2"},
+            ],
+        },
+        received=5.0,
+    )
+
+    assert snapshot.rx_bytes is None
+    assert snapshot.ac_power == 38.5
+    assert [(o.index, o.name, o.power) for o in snapshot.outlets] == [
+        (1, "NAS-PS1", 12.25),
+        (2, "Outlet 2", None),
+    ]
+
+
+def test_write_policy_deadbands():
+    """Test changes inside the deadband are held back until the heartbeat."""
+    policy = WritePolicy(absolute=1.0, relative=0.1, heartbeat=60)
+
+    assert not policy.should_write(100.0, 100.0, 3600)
+    assert not policy.should_write(100.0, 100.5, 10)
+    assert not policy.should_write(100.0, 109.0, 10)
+    assert policy.should_write(100.0, 111.0, 10)
+    assert policy.should_write(100.0, 100.5, 60)
+    assert policy.should_write(None, 1.0, 0)
+
+
+def test_write_policy_min_interval():
+    """Test writes are spaced by the minimum interval."""
+    policy = WritePolicy(min_interval=30)
+
+    assert not policy.should_write(1, 2, 10)
+    assert policy.should_write(1, 2, 30)
+
+
+def test_port_table_projection():
+    """Test port counters are packed into arrays and kept in the topology."""
+    snapshot = DeviceSnapshot.from_payload(
+        {
+            "mac": "aa:bb:cc:00:00:01",
+            "model": "US48PRO",
+            "port_table": [
+                {"port_idx": 1, "name": "Uplink", "rx_bytes": 5, "tx_bytes": 6},
+                {"port_idx": 2, "rx_bytes": 7},
+            ],
+        },
+        received=0.0,
+    )
+
+    assert snapshot.ports.indexes == (1, 2)
+    assert snapshot.ports.names == ("Uplink", "Port 2")
+    assert list(snapshot.ports.rx_bytes) == [5, 7]
+    assert list(snapshot.ports.tx_bytes) == [6, 0]
+    cached = DeviceSnapshot.from_payload(snapshot.topology(), 0.0)
+    assert cached.ports.names == snapshot.ports.names
+
+
+def test_cached_outlets_have_no_power():
+    """Test outlets restored from the topology have no power until polled."""
+    snapshot = DeviceSnapshot.from_payload(
+        {
+            "mac": "aa:bb:cc:00:00:02",
+            "model": "USPPDUP",
+            "outlet_table": [{"index": 1, "name": "NAS", "outlet_power": "12.5"}],
+        },
+        received=0.0,
+    )
+
+    assert snapshot.outlets[0].power == 12.5
+    cached = DeviceSnapshot.from_payload(snapshot.topology(), 0.0)
+    assert cached.outlets[0].name == "NAS"
+    assert cached.outlets[0].power is None
@@ -0,0 +1,159 @@
+"""Test the poller shared by config entries for the same controller."""
+
+import asyncio
+import contextlib
+from datetime import timedelta
+from functools import partial
+from unittest.mock import patch
+
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.unifi_network_poller.api import UnifiClient
+from custom_components.unifi_network_poller.const import (
+    CONF_SITE,
+    DATA_POLLERS,
+    DOMAIN,
+)
+from custom_components.unifi_network_poller.poller import (
+    async_acquire_poller,
+    async_release_poller,
+)
+
+from .fake_controller import PASSWORD, USERNAME, FakeController, make_devices
+
+
+@pytest.fixture
+async def controller(socket_enabled):
+    """Run a fake controller and point new clients at it over plain HTTP."""
+    controller = FakeController(make_devices(3, outlets=4))
+    await controller.start()
+    with patch(
+        "custom_components.unifi_network_poller.poller.UnifiClient",
+        partial(UnifiClient, scheme="http"),
+    ):
+        yield controller
+    await controller.stop()
+
+
+def _entry(hass, controller, **data):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_HOST: controller.host,
+            CONF_USERNAME: USERNAME,
+            CONF_PASSWORD: PASSWORD,
+            **data,
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def test_entries_share_poller(hass, controller):
+    """Test entries for one host log in and poll once and release the session."""
+    hass.data.setdefault(DOMAIN, {})
+    first, second = _entry(hass, controller), _entry(hass, controller)
+
+    pollers = await asyncio.gather(
+        async_acquire_poller(hass, first), async_acquire_poller(hass, second)
+    )
+
+    assert pollers[0] is pollers[1]
+    poller = pollers[0]
+    assert poller.entries == {first.entry_id, second.entry_id}
+    assert controller.requests["/api/auth/login"] == 1
+    assert controller.requests["/proxy/network/api/s/default/stat/device"] == 2
+
+    await async_release_poller(hass, first)
+    assert not poller.hub.session.closed
+    await async_release_poller(hass, second)
+    assert poller.hub.session.closed
+    assert not hass.data[DOMAIN][DATA_POLLERS]
+
+
+async def test_poller_restores_cached_topology(hass, controller):
+    """Test a new poller starts from the cached session and topology."""
+    hass.data.setdefault(DOMAIN, {})
+    entry = _entry(hass, controller)
+    poller = await async_acquire_poller(hass, entry)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    await async_release_poller(hass, entry)
+    await hass.async_block_till_done()
+
+    poller = await async_acquire_poller(hass, entry)
+
+    assert poller.restored
+    assert poller.coordinator.macs == list(controller.devices)
+    assert controller.requests["/api/auth/login"] == 1
+    poller.async_go_live()
+    assert not poller.restored
+    gateway = next(iter(controller.devices))
+    while poller.coordinator.data[gateway].rx_bytes is None:
+        await asyncio.sleep(0.01)
+    await async_release_poller(hass, entry)
+
+
+async def test_sites_get_their_own_poller(hass, controller):
+    """Test an entry for another site polls that site on the same login."""
+    hass.data.setdefault(DOMAIN, {})
+    default, lab = _entry(hass, controller), _entry(
+        hass, controller, **{CONF_SITE: "lab"}
+    )
+
+    first = await async_acquire_poller(hass, default)
+    second = await async_acquire_poller(hass, lab)
+
+    assert first is not second
+    assert first.hub.scope == controller.host
+    assert second.hub.scope == f"{controller.host}/lab"
+    assert second.hub.session is first.hub.session
+    assert controller.requests["/api/auth/login"] == 1
+    # Each lists and polls its own site.
+    assert controller.requests["/proxy/network/api/s/default/stat/device"] == 2
+    assert controller.requests["/proxy/network/api/s/lab/stat/device"] == 2
+    await async_release_poller(hass, default)
+    assert not second.hub.session.closed
+    await async_release_poller(hass, lab)
+    assert second.hub.session.closed
+
+
+async def test_push_stops_when_no_entry_wants_it(hass, controller):
+    """Test the event stream stops once the entry that wanted it is released."""
+    hass.data.setdefault(DOMAIN, {})
+    first, second = _entry(hass, controller), _entry(hass, controller)
+    poller = await async_acquire_poller(hass, first)
+    await async_acquire_poller(hass, second)
+    poller.async_start_push(first.entry_id)
+    task = poller._push_task
+
+    # The entry reloads without push, while the other entry keeps the poller.
+    await async_release_poller(hass, first)
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+    assert task.cancelled()
+    assert not poller.push_entries
+    await async_release_poller(hass, second)
+
+
+async def test_full_fetch_interval_follows_entries(hass, controller):
+    """Test gateways are fetched in full as often as any entry asks."""
+    hass.data.setdefault(DOMAIN, {})
+    first, second = _entry(hass, controller), _entry(hass, controller)
+    poller = await async_acquire_poller(hass, first)
+    await async_acquire_poller(hass, second)
+
+    poller.async_set_full_fetch_interval(first.entry_id, 300)
+    poller.async_set_full_fetch_interval(second.entry_id, 0)
+    assert poller.coordinator.full_fetch_interval == 0
+
+    await async_release_poller(hass, second)
+    assert poller.coordinator.full_fetch_interval == 300
+    await async_release_poller(hass, first)
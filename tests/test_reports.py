@@ -0,0 +1,64 @@
+"""Test turning the controller's hourly reports into statistics."""
+
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.unifi_network_poller.reports import (
+    gap_statistics,
+    hourly_totals,
+)
+
+START = dt_util.parse_datetime("2024-01-01T00:00:00+00:00")
+HOUR = timedelta(hours=1)
+
+
+def test_hourly_totals():
+    """Test report rows are keyed by their hour and rows without data skipped."""
+    first = int(START.timestamp() * 1000)
+    rows = [
+        {"time": first, "wan-rx_bytes": 10},
+        {"time": first + 3_600_000, "wan-rx_bytes": 20},
+        {"time": first + 7_200_000},
+    ]
+
+    assert hourly_totals(rows, "wan-rx_bytes") == {START: 10, START + HOUR: 20}
+
+
+def test_gap_statistics_count_back_from_recorded_hour():
+    """Test missing hours are counted back from the next recorded sum."""
+    existing = [(START, 100.0), (START + 4 * HOUR, 200.0), (START + 5 * HOUR, 210.0)]
+    totals = {START + hour * HOUR: 10.0 for hour in range(6)}
+
+    statistics = gap_statistics(existing, totals, START)
+
+    assert statistics == [
+        {"start": START + HOUR, "sum": 170.0},
+        {"start": START + 2 * HOUR, "sum": 180.0},
+        {"start": START + 3 * HOUR, "sum": 190.0},
+    ]
+
+
+def test_gap_statistics_never_below_hour_before_gap():
+    """Test sums inside the series stay at or above the hour before the gap."""
+    existing = [(START, 100.0), (START + 3 * HOUR, 110.0)]
+    totals = {START + hour * HOUR: 10.0 for hour in range(4)}
+
+    statistics = gap_statistics(existing, totals, START)
+
+    assert [row["sum"] for row in statistics] == [100.0, 100.0]
+
+
+def test_gap_statistics_reach_back_before_first_hour():
+    """Test the hours from ``since`` to the first recorded one are filled."""
+    existing = [(START + 2 * HOUR, 0.0)]
+    totals = {START + hour * HOUR: 5.0 for hour in range(3)}
+
+    statistics = gap_statistics(existing, totals, START)
+
+    assert statistics == [
+        {"start": START, "sum": -10.0},
+        {"start": START + HOUR, "sum": -5.0},
+    ]
+    # Hours after the last recorded one are left to the recorder.
+    assert gap_statistics(existing, totals, START + 2 * HOUR) == []
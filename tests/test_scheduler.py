@@ -0,0 +1,61 @@
+"""Test the adaptive poll scheduler."""
+import random
+
+from custom_components.unifi_network_poller.models import PollGroup
+from custom_components.unifi_network_poller.scheduler import PollScheduler
+
+GROUP = PollGroup(
+    name="gateway",
+    models=("UDMPROSE",),
+    interval=10,
+    min_interval=5,
+    max_interval=80,
+    signal_fn=lambda device: 0.0,
+    threshold=0.1,
+)
+
+
+def _scheduler() -> PollScheduler:
+    return PollScheduler((GROUP,), jitter=0.0, rng=random.Random(0))
+
+
+def test_due_and_next_delay():
+    """Test a group is due immediately and then after its interval."""
+    scheduler = _scheduler()
+    assert scheduler.due(0.0) == {"gateway"}
+
+    scheduler.succeeded("gateway", 0.0, moving=False)
+    assert scheduler.due(5.0) == set()
+    assert scheduler.next_delay(5.0) == 5.0
+    assert scheduler.due(10.0) == {"gateway"}
+
+
+def test_tightens_while_moving_and_relaxes():
+    """Test the interval shrinks while moving and returns to the base."""
+    scheduler = _scheduler()
+    scheduler.succeeded("gateway", 0.0, moving=True)
+    assert scheduler.interval("gateway") == 5
+    scheduler.succeeded("gateway", 5.0, moving=True)
+    assert scheduler.interval("gateway") == 5
+
+    scheduler.succeeded("gateway", 10.0, moving=False)
+    scheduler.succeeded("gateway", 17.5, moving=False)
+    assert scheduler.interval("gateway") == 10
+
+
+def test_backoff_on_failure():
+    """Test failures back off exponentially up to the maximum interval."""
+    scheduler = _scheduler()
+    scheduler.failed("gateway", 0.0)
+    assert scheduler.next_delay(0.0) == 20
+    scheduler.failed("gateway", 0.0)
+    scheduler.failed("gateway", 0.0)
+    scheduler.failed("gateway", 0.0)
+    assert scheduler.next_delay(0.0) == 80
+
+
+def test_jitter_stays_in_bounds():
+    """Test jitter never moves the next poll by more than the configured share."""
+    scheduler = PollScheduler((GROUP,), jitter=0.1, rng=random.Random(1))
+    scheduler.succeeded("gateway", 0.0, moving=False)
+    assert 9.0 <= scheduler.next_delay(0.0) <= 11.0
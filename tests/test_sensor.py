@@ -0,0 +1,153 @@
+"""Test the sensor platform against the fake controller."""
+
+from datetime import timedelta
+from functools import partial
+from unittest.mock import patch
+
+from homeassistant import loader
+from homeassistant.components.sensor import ATTR_STATE_CLASS, SensorStateClass
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    STATE_UNAVAILABLE,
+    UnitOfEnergy,
+)
+from homeassistant.core import State
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+    mock_restore_cache_with_extra_data,
+)
+
+from custom_components.unifi_network_poller.api import UnifiClient
+from custom_components.unifi_network_poller.const import (
+    CONF_DEVICES,
+    CONF_SITE,
+    DEVICE_UNAVAILABLE_AFTER,
+    DOMAIN,
+)
+
+from .fake_controller import PASSWORD, USERNAME, FakeController, make_devices
+
+GATEWAY_RX = "sensor.gateway_0_rx"
+PDU_ENERGY = "sensor.pdu_0_ac_energy"
+PDU_POWER = "sensor.pdu_0_ac_power_consumption"
+
+
+@pytest.fixture
+async def controller(socket_enabled):
+    """Run a fake controller and point new clients at it over plain HTTP."""
+    controller = FakeController(make_devices(2, outlets=2))
+    await controller.start()
+    with patch(
+        "custom_components.unifi_network_poller.poller.UnifiClient",
+        partial(UnifiClient, scheme="http"),
+    ):
+        yield controller
+    await controller.stop()
+
+
+async def _async_setup_entry(hass, controller, options=None):
+    """Set up a config entry polling the fake controller."""
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_HOST: controller.host,
+            CONF_USERNAME: USERNAME,
+            CONF_PASSWORD: PASSWORD,
+        },
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def _async_poll(hass, coordinator):
+    """Make every poll group due and run the next refresh."""
+    coordinator.scheduler.expire()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+
+
+async def test_entry_limited_to_selected_devices(hass, controller):
+    """Test an entry only gets entities for the devices it selected."""
+    _, pdu = controller.devices
+    entry = await _async_setup_entry(hass, controller, {CONF_DEVICES: [pdu]})
+
+    assert entry.version == 2
+    assert entry.data[CONF_SITE] == "default"
+    assert hass.states.get(PDU_POWER) is not None
+    assert hass.states.get(GATEWAY_RX) is None
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_unloading_one_entry_keeps_polling(hass, controller):
+    """Test the shared coordinator keeps polling for the entries still loaded."""
+    gateway, pdu = controller.devices
+    first = await _async_setup_entry(hass, controller, {CONF_DEVICES: [gateway]})
+    second = await _async_setup_entry(hass, controller, {CONF_DEVICES: [pdu]})
+    coordinator = hass.data[DOMAIN][second.entry_id].coordinator
+    assert hass.data[DOMAIN][first.entry_id].coordinator is coordinator
+
+    assert await hass.config_entries.async_unload(first.entry_id)
+    await hass.async_block_till_done()
+    polls = coordinator.stats.polls
+    await _async_poll(hass, coordinator)
+
+    assert coordinator.stats.polls > polls
+    assert hass.states.get(PDU_POWER).state != STATE_UNAVAILABLE
+    assert await hass.config_entries.async_unload(second.entry_id)
+
+
+async def test_energy_continues_restored_total(hass, controller):
+    """Test energy sensors continue from their state before the restart."""
+    mock_restore_cache_with_extra_data(
+        hass,
+        [
+            (
+                State(PDU_ENERGY, "12.5"),
+                {"native_value": 12.5, "native_unit_of_measurement": "kWh"},
+            )
+        ],
+    )
+    entry = await _async_setup_entry(hass, controller)
+
+    state = hass.states.get(PDU_ENERGY)
+    assert state.attributes[ATTR_UNIT_OF_MEASUREMENT] == UnitOfEnergy.KILO_WATT_HOUR
+    assert state.attributes[ATTR_STATE_CLASS] == SensorStateClass.TOTAL_INCREASING
+    assert float(state.state) == 12.5
+
+    await _async_poll(hass, hass.data[DOMAIN][entry.entry_id].coordinator)
+
+    assert float(hass.states.get(PDU_ENERGY).state) > 12.5
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_failing_device_goes_unavailable_alone(hass, controller):
+    """Test only the entities of a device that keeps failing go unavailable."""
+    entry = await _async_setup_entry(hass, controller)
+    coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
+    _, pdu = controller.devices
+    controller.failing.add(pdu)
+
+    for _ in range(DEVICE_UNAVAILABLE_AFTER - 1):
+        await _async_poll(hass, coordinator)
+        assert hass.states.get(PDU_POWER).state != STATE_UNAVAILABLE
+        coordinator.device_failures[pdu].retry_at = 0.0
+    await _async_poll(hass, coordinator)
+
+    assert hass.states.get(PDU_POWER).state == STATE_UNAVAILABLE
+    assert hass.states.get(GATEWAY_RX).state != STATE_UNAVAILABLE
+
+    controller.failing.clear()
+    coordinator.device_failures[pdu].retry_at = 0.0
+    await _async_poll(hass, coordinator)
+    assert hass.states.get(PDU_POWER).state != STATE_UNAVAILABLE
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,27 @@
+"""Test the poll instrumentation."""
+
+from custom_components.unifi_network_poller.stats import Histogram, PollStats
+
+
+def test_histogram_buckets():
+    """Test observations land in their bucket and are exposed cumulatively."""
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert list(histogram.buckets) == [2, 1, 1]
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+    assert histogram.max == 2.0
+    assert histogram.mean == 2.65 / 4
+
+
+def test_slowest_devices():
+    """Test devices are ranked by their mean latency."""
+    stats = PollStats()
+    stats.observe_device("fast", 0.01)
+    stats.observe_device("slow", 0.5)
+    stats.observe_device("slow", 0.3)
+
+    assert stats.slowest_devices(1) == [("slow", 0.4)]
+    assert stats.as_dict()["device_latency"]["fast"]["count"] == 1